@@ -0,0 +1,67 @@
+"""Compare pages/sec of the threaded and asyncio fetch engines against a local mock Petfinder server.
+
+Usage: python bench/bench_engines.py [--pages 50] [--latency 0.1] [--workers 10]
+"""
+# Standard imports
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local imports
+from mock_petfinder import MockPetfinderServer
+from petfinder.client import PetfinderAPIClient, PAGE_LIMIT
+
+
+BENCH_AFTER = "2024-12-31T00:00:00Z"  # Before the first synthetic animal, so every page is in the window
+
+
+def make_client(server, args):
+    client = PetfinderAPIClient("bench-id", "bench-secret", max_requests=args.pages + 10,
+                                requests_per_second=args.rate, max_workers=args.workers)
+    client.after = BENCH_AFTER
+    return server.point_client(client)
+
+
+def run_threaded(server, args):
+    client = make_client(server, args)
+    start = time.perf_counter()
+    pets = client.fetch_all_data()
+    return time.perf_counter() - start, pets
+
+
+def run_async(server, args):
+    client = make_client(server, args)
+    start = time.perf_counter()
+    pets = asyncio.run(client.fetch_all_data_async())
+    return time.perf_counter() - start, pets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds the mock server waits per response")
+    parser.add_argument("--workers", type=int, default=10, help="Threads or concurrent requests")
+    parser.add_argument("--rate", type=float, default=1000, help="Client requests-per-second limit")
+    args = parser.parse_args()
+
+    total_count = args.pages * PAGE_LIMIT
+    with MockPetfinderServer(total_count=total_count, latency=args.latency) as server:
+        server.warm(PAGE_LIMIT, BENCH_AFTER)  # Neither engine should pay for generating pages
+        results = {}
+        for name, engine in (("threaded", run_threaded), ("asyncio", run_async)):
+            elapsed, pets = engine(server, args)
+            results[name] = (elapsed, len(pets))
+
+    print()
+    print(f"{'engine':<10} {'seconds':>8} {'records':>8} {'pages/sec':>10}")
+    for name, (elapsed, records) in results.items():
+        print(f"{name:<10} {elapsed:>8.2f} {records:>8} {args.pages / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
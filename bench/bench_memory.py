@@ -0,0 +1,71 @@
+"""Memory per in-flight record: raw parsed JSON vs projected, interned row tuples, and object vs categorical DataFrames.
+
+Usage: python bench/bench_memory.py [--records 100000]
+"""
+# Standard imports
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# External imports
+import pandas as pd
+
+# Local imports
+from mock_petfinder import make_animal
+from petfinder.loader import PetFinderDataLoader
+from petfinder.schema import RAW_COLUMNS, project_pets
+
+
+def page_bodies(records, limit=100):
+    """Encoded API pages, as they come off the wire."""
+    rng = random.Random(0)
+    animals = [make_animal(animal_id, rng) for animal_id in range(1, records + 1)]
+    return [json.dumps({"animals": animals[start:start + limit]}).encode() for start in range(0, records, limit)]
+
+
+def held_bytes(build):
+    """Bytes still allocated by whatever build() returns, once its temporaries are freed."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    bodies = page_bodies(args.records)
+    raw_bytes, raw = held_bytes(lambda: [pet for body in bodies for pet in json.loads(body)["animals"]])
+    del raw
+    rows_bytes, rows = held_bytes(lambda: [row for body in bodies for row in project_pets(json.loads(body)["animals"])])
+
+    object_df = pd.DataFrame.from_records(rows, columns=RAW_COLUMNS)
+    categorical_df = PetFinderDataLoader.rows_to_dataframe(rows)
+
+    results = [
+        ("raw JSON dicts", raw_bytes),
+        ("projected rows", rows_bytes),
+        ("object DataFrame", object_df.memory_usage(deep=True).sum()),
+        ("categorical DataFrame", categorical_df.memory_usage(deep=True).sum()),
+    ]
+    print(f"{'representation':<22} {'MiB':>8} {'bytes/record':>13}")
+    for name, size in results:
+        print(f"{name:<22} {size / 2 ** 20:>8.1f} {size / args.records:>13,.0f}")
+    print(f"rows vs raw: {raw_bytes / rows_bytes:.1f}x smaller, "
+          f"categorical vs object DataFrame: {results[2][1] / results[3][1]:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
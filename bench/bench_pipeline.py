@@ -0,0 +1,159 @@
+"""End-to-end ingestion benchmark against a local mock Petfinder server and in-process GCS/BigQuery fakes.
+
+Reports pages/sec, records/sec, peak RSS and per-stage timings, with no credentials needed.
+
+Usage: python bench/bench_pipeline.py [--pages 100] [--latency 0.05] [--format csv] [--json results.json]
+"""
+# Standard imports
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local imports
+from fake_gcp import FakeStorageClient, FakeBigQueryClient
+from mock_petfinder import MockPetfinderServer
+import petfinder.client
+from petfinder.client import PetfinderAPIClient, PAGE_LIMIT
+from petfinder.loader import PetFinderDataLoader, OUTPUT_FORMAT
+from petfinder.metrics import RunMetrics
+
+
+BENCH_AFTER = "2024-12-31T00:00:00Z"  # Before the first synthetic animal, so every page is in the window
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB (ru_maxrss is KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.stages[name] = {"seconds": round(time.perf_counter() - start, 4), "peak_rss_mb": round(peak_rss_mb(), 1)}
+        return result
+
+
+def make_client(server, args, metrics):
+    client = PetfinderAPIClient("bench-id", "bench-secret", max_requests=args.pages * 2 + 10,
+                                requests_per_second=args.rate, max_workers=args.workers, metrics=metrics)
+    client.after = BENCH_AFTER
+    return server.point_client(client)
+
+
+def make_loader(args, metrics):
+    storage_client = FakeStorageClient(upload_latency=args.upload_latency)
+    bigquery_client = FakeBigQueryClient(storage_client, job_latency=args.job_latency)
+    return PetFinderDataLoader(None, "bench-bucket", "bench-project", "petfinder_data", "raw_petfinder",
+                               output_format=args.format, load_mode=args.load_mode,
+                               sink="bigquery" if args.format == "parquet" else "gcs",  # CSV is never loaded
+                               storage_client=storage_client, bigquery_client=bigquery_client, metrics=metrics)
+
+
+def run_staged(server, args):
+    """The stages one after another, as in the original main()."""
+    timer = StageTimer()
+    metrics = RunMetrics()
+    client = make_client(server, args, metrics)
+    loader = make_loader(args, metrics)
+    blob_name = f"processed/bench.{args.format}"
+
+    pets = timer.run("fetch_all_data", client.fetch_all_data)
+    df = timer.run("transform_to_dataframe", loader.transform_to_dataframe, pets)
+    save = loader.save_parquet_to_gcs if args.format == "parquet" else loader.save_csv_to_gcs
+    timer.run(f"save_{args.format}_to_gcs", save, df, blob_name)
+    timer.run("load_to_bigquery", loader.load_to_bigquery, blob_name)
+    return timer, client, loader, len(pets)
+
+
+def run_pipelined(server, args):
+    """The streaming producer/consumer path used by the daily run."""
+    timer = StageTimer()
+    metrics = RunMetrics()
+    client = make_client(server, args, metrics)
+    loader = make_loader(args, metrics)
+    timer.run("stream_transform_upload", loader.stream_transform_upload, client.iter_pages())
+    rows = sum(len(table) for table in loader.bigquery_client.tables.values()) if loader.sink == "bigquery" \
+        else loader.metrics.counters.get("records_uploaded", 0)
+    return timer, client, loader, rows
+
+
+def report(name, server_stats, timer, client, loader, records):
+    total = sum(stage["seconds"] for stage in timer.stages.values())
+    return {
+        "mode": name,
+        "pages": len(client.fetched_pages),
+        "records": records,
+        "seconds": round(total, 4),
+        "pages_per_sec": round(len(client.fetched_pages) / total, 1),
+        "records_per_sec": round(records / total, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "requests": client.request_count,
+        "bytes_uploaded": loader.bucket.bytes_uploaded,
+        "server": server_stats,
+        "stages": timer.stages,
+        "run_report": loader.metrics.report(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the mock server waits per response")
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=1000, help="Client requests-per-second limit")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Mock answers every Nth page with a 429")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="Seconds each mock access token lives")
+    parser.add_argument("--token-skew", type=int, default=0,
+                        help="Mock expires tokens this many seconds early, to exercise 401 handling")
+    parser.add_argument("--upload-latency", type=float, default=0.0, help="Seconds added to every fake upload")
+    parser.add_argument("--job-latency", type=float, default=0.0, help="Seconds added to every fake BigQuery job")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=OUTPUT_FORMAT)
+    parser.add_argument("--load-mode", choices=["append", "merge"], default="append")
+    parser.add_argument("--mode", choices=["staged", "pipelined", "both"], default="both")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON, for comparing runs")
+    args = parser.parse_args(argv)
+
+    petfinder.client.BACKOFF_BASE = 0.01  # Keep retry waits short against the mock
+
+    results = []
+    total_count = args.pages * PAGE_LIMIT
+    with MockPetfinderServer(total_count=total_count, latency=args.latency, throttle_every=args.throttle_every,
+                             token_ttl=args.token_ttl, token_skew=args.token_skew) as server:
+        server.warm(PAGE_LIMIT, BENCH_AFTER)
+        modes = {"staged": run_staged, "pipelined": run_pipelined}
+        for name in (modes if args.mode == "both" else [args.mode]):
+            before = server.stats()
+            outcome = modes[name](server, args)
+            server_stats = {key: value - before[key] for key, value in server.stats().items()}
+            results.append(report(name, server_stats, *outcome))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    print()
+    for result in results:
+        print(f"{result['mode']}: {result['pages']} pages, {result['records']} records in {result['seconds']:.2f}s "
+              f"({result['pages_per_sec']} pages/sec, {result['records_per_sec']} records/sec), "
+              f"peak RSS {result['peak_rss_mb']} MiB")
+        for stage, timing in result["stages"].items():
+            print(f"  {stage:<26} {timing['seconds']:>8.3f}s  peak RSS {timing['peak_rss_mb']:>7.1f} MiB")
+        print(f"  requests {result['requests']}, uploaded {result['bytes_uploaded']} bytes, server {result['server']}")
+        counters = result["run_report"]["counters"]
+        print(f"  retries {counters.get('retries', 0)}, 429s {counters.get('throttled_429', 0)}, "
+              f"401s {counters.get('unauthorized_401', 0)}, downloaded {counters.get('bytes_downloaded', 0)} bytes, "
+              f"loader stages {result['run_report']['stages']}")
+
+
+if __name__ == "__main__":
+    main()
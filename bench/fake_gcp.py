@@ -0,0 +1,189 @@
+# Standard imports
+import io
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# External imports
+import pandas as pd
+
+
+# Fake Google Cloud Storage
+class FakeBlob:
+    """In-memory stand-in for google.cloud.storage.Blob, covering the calls the loader makes."""
+
+    def __init__(self, bucket, name, chunk_size=None):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = chunk_size
+
+    def upload_from_string(self, data, content_type=None):
+        self.bucket.put(self.name, data.encode() if isinstance(data, str) else data)
+
+    def open(self, mode="r", content_type=None):
+        if mode in ("w", "wt"):
+            return io.TextIOWrapper(FakeBlobWriter(self), encoding="utf-8")
+        if mode == "wb":
+            return FakeBlobWriter(self)
+        if mode in ("r", "rt"):
+            return io.StringIO(self.download_as_text())
+        if mode == "rb":
+            return io.BytesIO(self.download_as_bytes())
+        raise NotImplementedError(mode)
+
+    def exists(self):
+        return self.name in self.bucket.objects
+
+    @property
+    def size(self):
+        return len(self.bucket.objects[self.name])
+
+    @property
+    def updated(self):
+        return self.bucket.updated[self.name]
+
+    def download_as_bytes(self):
+        return self.bucket.objects[self.name]
+
+    def download_as_text(self):
+        return self.download_as_bytes().decode()
+
+    def delete(self):
+        with self.bucket.lock:
+            del self.bucket.objects[self.name]
+            del self.bucket.updated[self.name]
+
+
+class FakeBlobWriter(io.BytesIO):
+    """Collects a streamed upload and stores it when closed, like a finished resumable upload."""
+
+    def __init__(self, blob):
+        super().__init__()
+        self.blob = blob
+
+    def close(self):
+        if not self.closed:
+            self.blob.bucket.put(self.blob.name, self.getvalue())
+        super().close()
+
+
+class FakeBucket:
+    def __init__(self, name, upload_latency=0.0, upload_bandwidth=None):
+        self.name = name
+        self.objects = {}
+        self.updated = {}  # Object name -> upload time
+        self.upload_latency = upload_latency      # Seconds added to every upload
+        self.upload_bandwidth = upload_bandwidth  # Bytes per second, None for unlimited
+        self.bytes_uploaded = 0
+        self.lock = threading.Lock()
+
+    def blob(self, name, chunk_size=None):
+        return FakeBlob(self, name, chunk_size)
+
+    def list_blobs(self, prefix=None):
+        with self.lock:
+            names = sorted(name for name in self.objects if name.startswith(prefix or ""))
+        return [FakeBlob(self, name) for name in names]
+
+    def put(self, name, data):
+        delay = self.upload_latency + (len(data) / self.upload_bandwidth if self.upload_bandwidth else 0)
+        time.sleep(delay)
+        with self.lock:
+            self.objects[name] = data
+            self.updated[name] = datetime.now(timezone.utc)
+            self.bytes_uploaded += len(data)
+
+
+class FakeStorageClient:
+    """In-memory stand-in for google.cloud.storage.Client."""
+
+    def __init__(self, upload_latency=0.0, upload_bandwidth=None):
+        self.upload_latency = upload_latency
+        self.upload_bandwidth = upload_bandwidth
+        self.buckets = {}
+
+    def bucket(self, name):
+        if name not in self.buckets:
+            self.buckets[name] = FakeBucket(name, self.upload_latency, self.upload_bandwidth)
+        return self.buckets[name]
+
+
+# Fake BigQuery
+class FakeJob:
+    def __init__(self, num_dml_affected_rows=None, output_rows=None):
+        self.num_dml_affected_rows = num_dml_affected_rows
+        self.output_rows = output_rows
+
+    def result(self):
+        return self
+
+
+class FakeBigQueryClient:
+    """In-process stand-in for google.cloud.bigquery.Client.
+
+    Load jobs read the objects from a FakeStorageClient into pandas tables, and the
+    CREATE TABLE ... LIKE and MERGE statements the loader issues are applied in pandas,
+    so row counts and deduplication can be checked offline. Partition decorators are
+    stripped, so a partition-decorated load lands in the whole table.
+    """
+
+    def __init__(self, storage_client, job_latency=0.0):
+        self.storage_client = storage_client
+        self.job_latency = job_latency  # Seconds added to every load or query job
+        self.tables = {}
+        self.load_jobs = 0
+        self.queries = 0
+
+    def read_uri(self, uri, source_format):
+        bucket_name, blob_name = uri.removeprefix("gs://").split("/", 1)
+        data = self.storage_client.bucket(bucket_name).objects[blob_name]
+        if source_format == "PARQUET":
+            return pd.read_parquet(io.BytesIO(data))
+        return pd.read_csv(io.BytesIO(data))
+
+    def create_table(self, table, exists_ok=False):
+        table_ref = f"{table.project}.{table.dataset_id}.{table.table_id}"
+        if table_ref in self.tables and not exists_ok:
+            raise KeyError(table_ref)
+        self.tables.setdefault(table_ref, pd.DataFrame(columns=[field.name for field in table.schema]))
+        return table
+
+    def load_table_from_uri(self, uris, table_ref, job_config=None):
+        time.sleep(self.job_latency)
+        self.load_jobs += 1
+        table_ref = table_ref.split("$")[0]
+        uris = [uris] if isinstance(uris, str) else uris
+        df = pd.concat([self.read_uri(uri, job_config.source_format) for uri in uris], ignore_index=True)
+        loaded_rows = len(df)
+        existing = self.tables.get(table_ref)
+        if job_config.write_disposition == "WRITE_APPEND" and existing is not None and not existing.empty:
+            df = pd.concat([existing, df], ignore_index=True)
+        self.tables[table_ref] = df
+        return FakeJob(output_rows=loaded_rows)
+
+    def query(self, sql):
+        time.sleep(self.job_latency)
+        self.queries += 1
+        like = re.search(r"CREATE TABLE IF NOT EXISTS `([^`]+)` LIKE `([^`]+)`", sql)
+        if like:
+            target, source = like.groups()
+            self.tables.setdefault(target, self.tables[source].iloc[0:0])
+            return FakeJob()
+
+        merge = re.search(r"MERGE `([^`]+)` T.*?FROM `([^`]+)`", sql, re.S)
+        if merge:
+            target, source = merge.groups()
+            staged = self.tables[source].sort_values("published_at").drop_duplicates("id", keep="last")
+            existing = self.tables[target]
+            kept = existing[~existing["id"].isin(staged["id"])]
+            self.tables[target] = pd.concat([kept, staged], ignore_index=True)
+            return FakeJob(num_dml_affected_rows=len(staged))
+
+        raise NotImplementedError(sql)
+
+    def delete_table(self, table_ref, not_found_ok=False):
+        if table_ref not in self.tables and not not_found_ok:
+            raise KeyError(table_ref)
+        self.tables.pop(table_ref, None)
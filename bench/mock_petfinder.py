@@ -0,0 +1,241 @@
+# Standard imports
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+SPECIES = ["Dog", "Cat", "Rabbit", "Bird", "Horse"]
+AGES = ["Baby", "Young", "Adult", "Senior"]
+GENDERS = ["Male", "Female"]
+SIZES = ["Small", "Medium", "Large", "Extra Large"]
+BREEDS = ["Domestic Short Hair", "Labrador Retriever", "Pit Bull Terrier", "Siamese", "Mixed Breed"]
+COLORS = ["Black", "White", "Orange", "Brown", "Gray"]
+STATES = [("Austin", "TX"), ("Denver", "CO"), ("Portland", "OR"), ("Tampa", "FL"), ("Boston", "MA")]
+
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+def species_of(animal_id):
+    """Species are assigned round-robin by id, so the mock can filter on type without generating animals."""
+    return SPECIES[animal_id % len(SPECIES)]
+
+
+def make_animal(animal_id, rng=random, published_at="2025-01-01T00:00:00+0000"):
+    """Generate one synthetic animal shaped like a Petfinder v2 response record."""
+    city, state = rng.choice(STATES)
+    return {
+        "id": animal_id,
+        "organization_id": f"{state}{rng.randint(1, 500)}",
+        "species": species_of(animal_id),
+        "breeds": {"primary": rng.choice(BREEDS), "secondary": None, "mixed": False, "unknown": False},
+        "colors": {"primary": rng.choice(COLORS), "secondary": None, "tertiary": None},
+        "age": rng.choice(AGES),
+        "gender": rng.choice(GENDERS),
+        "size": rng.choice(SIZES),
+        "name": f"Pet {animal_id}",
+        "status": "adoptable",
+        "attributes": {
+            "spayed_neutered": rng.random() < 0.5,
+            "house_trained": rng.random() < 0.5,
+            "declawed": False,
+            "special_needs": rng.random() < 0.1,
+            "shots_current": rng.random() < 0.8,
+        },
+        "environment": {"children": rng.choice([True, False, None]), "dogs": None, "cats": None},
+        "tags": rng.sample(["Friendly", "Playful", "Quiet", "Smart", "Curious"], 2),
+        "contact": {
+            "email": f"rescue{animal_id % 100}@example.org",
+            "address": {"city": city, "state": state, "postcode": f"{rng.randint(10000, 99999)}"},
+        },
+        "published_at": published_at,
+        "description": "A synthetic animal for benchmarking. " * 5,
+        "photos": [{"small": "https://example.org/s.jpg", "full": "https://example.org/f.jpg"}],
+    }
+
+
+class BenchHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Accept bursts of concurrent connections without dropping SYNs
+
+
+# Mock Petfinder Server
+class MockPetfinderServer:
+    """Local fake of the Petfinder v2 OAuth and animals endpoints.
+
+    Serves synthetic animals with pagination, after/before windows, type filters and sorting,
+    and can simulate latency, 429 throttling and expiring tokens. Other filters are ignored.
+    """
+
+    def __init__(self, total_count=5000, latency=0.05, first_published=datetime(2025, 1, 1, tzinfo=timezone.utc),
+                 interval=timedelta(minutes=10), throttle_every=0, retry_after=0, token_ttl=3600, token_skew=0):
+        self.total_count = total_count
+        self.latency = latency  # Seconds added to every response
+        self.first_published = first_published  # Animal n is published (n - 1) intervals after this
+        self.interval = interval
+        self.throttle_every = throttle_every  # Answer every Nth animals request with a 429, 0 to never throttle
+        self.retry_after = retry_after        # Retry-After seconds sent with each 429
+        self.token_ttl = token_ttl            # expires_in reported for each token
+        self.token_skew = token_skew          # Tokens really expire this many seconds before expires_in says
+        self.tokens = {}                      # Access token -> expiry time
+        self.request_count = 0
+        self.animals_requests = 0
+        self.throttled_count = 0
+        self.unauthorized_count = 0
+        self.lock = threading.Lock()
+        self.page_cache = {}  # Encoded pages, so generating animals doesn't compete with the client for the GIL
+        self.server = BenchHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        return {
+            "requests": self.request_count,
+            "tokens_issued": len(self.tokens),
+            "throttled": self.throttled_count,
+            "unauthorized": self.unauthorized_count,
+        }
+
+    def issue_token(self):
+        with self.lock:
+            token = f"mock-token-{len(self.tokens) + 1}"
+            self.tokens[token] = time.time() + self.token_ttl - self.token_skew
+        return {"token_type": "Bearer", "expires_in": self.token_ttl, "access_token": token}
+
+    def is_authorized(self, header):
+        token = (header or "").removeprefix("Bearer ")
+        expiry = self.tokens.get(token)
+        return expiry is not None and time.time() < expiry
+
+    def should_throttle(self):
+        with self.lock:
+            self.animals_requests += 1
+            throttle = self.throttle_every and self.animals_requests % self.throttle_every == 0
+            if throttle:
+                self.throttled_count += 1
+        return throttle
+
+    def point_client(self, client):
+        """Redirect a PetfinderAPIClient at this server."""
+        client.token_url = f"{self.url}/v2/oauth2/token"
+        client.base_url = f"{self.url}/v2/animals"
+        return client
+
+    def published_at(self, animal_id):
+        return self.first_published + self.interval * (animal_id - 1)
+
+    def id_range(self, after, before):
+        """Ids published strictly after `after` and before `before`, as [first, stop)."""
+        first, stop = 1, self.total_count + 1
+        if after:
+            offset = (datetime.strptime(after, TIME_FORMAT) - self.first_published) / self.interval
+            first = max(first, int(offset // 1) + 2 if offset >= 0 else 1)
+        if before:
+            offset = (datetime.strptime(before, TIME_FORMAT) - self.first_published) / self.interval
+            stop = min(stop, -int(-offset // 1) + 1 if offset >= 0 else 1)
+        return first, max(first, stop)
+
+    def animals_page(self, params):
+        limit = int(params.get("limit", ["20"])[0])
+        page = int(params.get("page", ["1"])[0])
+        after = params.get("after", [None])[0]
+        before = params.get("before", [None])[0]
+        oldest_first = params.get("sort", ["recent"])[0] == "-recent"
+        animal_type = params.get("type", [None])[0]
+        key = (limit, page, after, before, oldest_first, animal_type)
+        if key not in self.page_cache:
+            page_data = self.build_page(limit, page, after, before, oldest_first, animal_type)
+            self.page_cache[key] = json.dumps(page_data).encode()
+        return self.page_cache[key]
+
+    def warm(self, limit, after=None, sort="-recent"):
+        """Pre-encode every page for the given page size and query."""
+        first, stop = self.id_range(after, None)
+        for page in range(1, (stop - first + limit - 1) // limit + 1):
+            params = {"limit": [str(limit)], "page": [str(page)], "sort": [sort]}
+            if after:
+                params["after"] = [after]
+            self.animals_page(params)
+
+    def build_page(self, limit, page, after=None, before=None, oldest_first=False, animal_type=None):
+        first, stop = self.id_range(after, before)
+        ids = range(first, stop) if oldest_first else range(stop - 1, first - 1, -1)
+        if animal_type:
+            ids = [animal_id for animal_id in ids if species_of(animal_id) == animal_type]
+        total_count = len(ids)
+        rng = random.Random(page)
+        return {
+            "animals": [make_animal(animal_id, rng, self.published_at(animal_id).strftime(TIME_FORMAT))
+                        for animal_id in ids[(page - 1) * limit:page * limit]],
+            "pagination": {
+                "count_per_page": limit,
+                "total_count": total_count,
+                "current_page": page,
+                "total_pages": (total_count + limit - 1) // limit,
+            },
+        }
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, payload, headers=None):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server.lock:
+                    server.request_count += 1
+                time.sleep(server.latency)
+                self.send_json(200, server.issue_token())
+
+            def do_GET(self):
+                with server.lock:
+                    server.request_count += 1
+                time.sleep(server.latency)
+                url = urlparse(self.path)
+                if url.path != "/v2/animals":
+                    self.send_json(404, {"title": "Not Found"})
+                elif not server.is_authorized(self.headers.get("Authorization")):
+                    with server.lock:
+                        server.unauthorized_count += 1
+                    self.send_json(401, {"title": "Unauthorized", "detail": "Access token invalid or expired"})
+                elif server.should_throttle():
+                    self.send_json(429, {"title": "Too Many Requests"}, {"Retry-After": str(server.retry_after)})
+                else:
+                    self.send_json(200, server.animals_page(parse_qs(url.query)))
+
+        return Handler
@@ -0,0 +1,4 @@
+"""Petfinder ingestion: fetch animals from the Petfinder API, stage them in GCS and load them into BigQuery.
+
+Run it with python -m petfinder {daily,resume,backfill,bench}; see petfinder.cli.
+"""
@@ -0,0 +1,5 @@
+# Local imports
+from petfinder.cli import main
+
+
+main()
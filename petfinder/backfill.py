@@ -0,0 +1,141 @@
+# Standard imports
+import threading
+from datetime import datetime, timedelta, timezone
+
+
+# Local imports
+from petfinder.loader import PetFinderDataLoader
+
+
+# Constants
+MAX_REQUESTS_PER_DAY = 100
+LOOKBACK_DAYS = 87             # Default backfill range when --from is not set
+MAX_PAGES_PER_WINDOW = 20      # Split the range until each window needs at most this many pages
+MIN_WINDOW = timedelta(hours=1)  # Never split windows below this, however many pets they hold
+WINDOW_WORKERS = 4             # Windows fetched at the same time, sharing the request budget
+BACKFILL_STATE_BLOB = "state/petfinder_backfill_state.json"
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD or ISO 8601 UTC date."""
+    for fmt in ("%Y-%m-%d", TIME_FORMAT):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date: {value}")
+
+
+# Backfill Planner
+class BackfillPlanner:
+    """Split a [after, before) published_at range into windows that each need few pages.
+
+    Planning is kept in the backfill state as it goes: ranges still to be counted or split
+    wait in state["pending"], finished windows are added to state["windows"], and the state
+    is saved after every count. Counting stops when the request budget runs out, and the
+    next run carries on from the pending ranges instead of starting over.
+    """
+
+    def __init__(self, client, save, max_pages_per_window=MAX_PAGES_PER_WINDOW):
+        self.client = client
+        self.save = save  # Called with the state after each step, e.g. a state store's write
+        self.max_pages_per_window = max_pages_per_window
+
+    @staticmethod
+    def new_state(after, before):
+        """Backfill state for a range not planned yet, holding the whole range as one pending range."""
+        after, before = after.strftime(TIME_FORMAT), before.strftime(TIME_FORMAT)
+        return {"after": after, "before": before, "windows": [],
+                "pending": [{"after": after, "before": before, "total_count": None}]}
+
+    def count(self, after, before):
+        """Number of pets published in the window, one request each. None if the budget is spent."""
+        return self.client.for_window(after, before).fetch_total_count()
+
+    def plan(self, state):
+        """Count and split the pending ranges of the state into windows, oldest first.
+
+        Oversized windows are split into as many equal parts as their page count calls for,
+        then each part is counted again, so busy periods end up with narrower windows.
+        Returns whether planning is finished.
+        """
+        pending = state.setdefault("pending", [])
+        while pending:
+            span = pending[-1]
+            if span["total_count"] is None:
+                if self.client.rate_limiter.remaining() == 0:
+                    break
+                span["total_count"] = self.count(span["after"], span["before"])
+                if span["total_count"] is None:
+                    break
+            pending.pop()
+
+            start, end, total = parse_date(span["after"]), parse_date(span["before"]), span["total_count"]
+            pages = -(-total // self.client.page_limit)
+            if pages <= self.max_pages_per_window or end - start <= MIN_WINDOW:
+                state["windows"].append(dict(span, resume_after=None, done=False))
+                state["windows"].sort(key=lambda window: window["after"])
+            else:
+                parts = min(-(-pages // self.max_pages_per_window), max(1, int((end - start) / MIN_WINDOW)))
+                step = (end - start) / parts
+                for part in range(parts):
+                    part_end = end if part == parts - 1 else start + step * (part + 1)
+                    pending.append({"after": (start + step * part).strftime(TIME_FORMAT),
+                                    "before": part_end.strftime(TIME_FORMAT), "total_count": None})
+            self.save(state)
+
+        windows = state["windows"]
+        print(f"Planned {len(windows)} windows for {sum(w['total_count'] for w in windows)} pets"
+              + (f", {len(pending)} ranges left to plan by the next run." if pending else "."))
+        return not pending
+
+
+# PetFinder Backfill Data Loader
+class PetFinderBackfillDataLoader(PetFinderDataLoader):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_ids = set()  # Pages are transformed one at a time, so remember ids across pages
+        self.seen_lock = threading.Lock()  # Windows are transformed on several threads
+
+    def transform_to_dataframe(self, pet_data):
+        """Convert pet data JSON to a Pandas DataFrame, keeping one row per pet."""
+        df = super().transform_to_dataframe(pet_data)
+        if df.empty:
+            return df
+
+        # ✅ Remove duplicate records based on 'id'
+        record_count = len(df)
+        df = df.drop_duplicates(subset=['id'], keep='last')
+        with self.seen_lock:
+            df = df[~df['id'].isin(self.seen_ids)]
+            self.seen_ids.update(df['id'])
+
+        self.metrics.count("dedup_input_records", record_count)
+        self.metrics.count("dedup_dropped_records", record_count - len(df))
+        return df
+
+
+def backfill_window(client, loader, window, workers, run_name):
+    """Fetch what earlier runs haven't loaded of one window into a part file of this run.
+
+    Returns (window_client, blob_name); blob_name is None when no pets were fetched. Pass
+    the client to finish_window once the part is loaded, so its progress is recorded.
+    """
+    window_client = client.for_window(window.get("resume_after") or window["after"], window["before"])
+    blob_name = f"backfill/{run_name}/petfinder_{window['after']}_{window['before']}.{loader.output_format}" \
+        .replace(":", "")
+    rows = loader.stream_to_gcs(window_client.iter_pages(workers), blob_name)
+    return window_client, blob_name if rows else None
+
+
+def finish_window(window, client):
+    """Record whether a window is now complete, and if not, where the next run resumes it (see resume_after)."""
+    window["done"] = client.is_complete()
+    resume_after = client.resume_after()
+    if not window["done"]:
+        if resume_after is not None:
+            window["resume_after"] = max(filter(None, [window.get("resume_after"), resume_after]))
+        print(f"Window {window['after']} - {window['before']} incomplete, "
+              f"resuming after {window.get('resume_after') or window['after']} next run.")
+    return window["done"]
@@ -0,0 +1,181 @@
+# Standard imports
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+# Local imports
+from petfinder.metrics import RunMetrics
+
+
+# Constants
+CACHE_PREFIX = "cache/animals"    # Raw responses in the bucket, one gzipped NDJSON object per page
+CACHE_TTL = 24 * 3600             # Seconds a cached page is served instead of fetching it again
+CACHE_MAX_BYTES = 2 * 1024 ** 3   # Compressed bytes kept; prune() drops the oldest pages beyond this
+CACHE_MEMORY_BYTES = 64 * 1024 ** 2  # Compressed pages also kept in memory, so repeats in a run skip the store
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+# Response Cache Stores
+class LocalCacheStore:
+    """Keep cached responses as files under a local directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def read(self, name):
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)  # Readers never see a half-written page
+
+    def list(self):
+        """(name, size in bytes, modification time) of every cached object."""
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if file_name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, file_name)
+                stat = os.stat(path)
+                yield os.path.relpath(path, self.directory), stat.st_size, stat.st_mtime
+
+    def delete(self, name):
+        os.remove(os.path.join(self.directory, name))
+
+
+class GCSCacheStore:
+    """Keep cached responses as objects under a prefix of the data bucket."""
+
+    def __init__(self, bucket, prefix=CACHE_PREFIX):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def read(self, name):
+        blob = self.bucket.blob(f"{self.prefix}/{name}")
+        if not blob.exists():
+            return None
+        return blob.download_as_bytes()
+
+    def write(self, name, data):
+        blob = self.bucket.blob(f"{self.prefix}/{name}")
+        blob.upload_from_string(data, "application/gzip")
+
+    def list(self):
+        """(name, size in bytes, update time) of every cached object."""
+        for blob in self.bucket.list_blobs(prefix=f"{self.prefix}/"):
+            yield blob.name[len(self.prefix) + 1:], blob.size, blob.updated.timestamp()
+
+    def delete(self, name):
+        self.bucket.blob(f"{self.prefix}/{name}").delete()
+
+
+# Response Cache
+class ResponseCache:
+    """Raw animals responses as gzipped NDJSON, keyed by query parameters and page.
+
+    Each page is one object, <query hash>/<page>.ndjson.gz, holding one line with the
+    query, when it was fetched and the response body exactly as the API sent it. A fetch
+    reads through the cache and uses a page fetched less than ttl seconds ago instead of
+    spending a request on it. replay() reads every cached page back to rebuild the tables
+    without touching the API. The gzip members concatenate, so a query's pages can also be
+    read as a single NDJSON file.
+    """
+
+    def __init__(self, store, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, memory_bytes=CACHE_MEMORY_BYTES,
+                 metrics=None):
+        self.store = store
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.metrics = metrics or RunMetrics()
+        self.memory = OrderedDict()  # Entry name -> compressed entry, least recently used first
+        self.memory_size = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def entry_name(params):
+        """Object name of a page: a hash of the query without the page number, then the page."""
+        query = {key: value for key, value in params.items() if key != "page"}
+        query_hash = hashlib.sha256(json.dumps(query, sort_keys=True).encode()).hexdigest()[:16]
+        return f"{query_hash}/{int(params.get('page', 1)):05d}.ndjson.gz"
+
+    def remember(self, name, data):
+        """Keep a compressed entry in memory, evicting the least recently used beyond memory_bytes."""
+        with self.lock:
+            if name in self.memory:
+                self.memory_size -= len(self.memory.pop(name))
+            self.memory[name] = data
+            self.memory_size += len(data)
+            while self.memory_size > self.memory_bytes and self.memory:
+                self.memory_size -= len(self.memory.popitem(last=False)[1])
+
+    def get(self, params):
+        """The cached response body for a query and page, or None if there is none fresher than ttl."""
+        name = self.entry_name(params)
+        with self.lock:
+            data = self.memory.get(name)
+            if data is not None:
+                self.memory.move_to_end(name)
+        if data is None:
+            data = self.store.read(name)
+            if data is not None:
+                self.remember(name, data)
+
+        entry = json.loads(gzip.decompress(data)) if data is not None else None
+        if entry is None or time.time() - datetime.strptime(entry["fetched_at"], TIME_FORMAT).replace(
+                tzinfo=timezone.utc).timestamp() > self.ttl:
+            self.metrics.count("cache_misses")
+            return None
+        self.metrics.count("cache_hits")
+        return entry["body"]
+
+    def put(self, params, content):
+        """Cache one response body, given as the raw bytes or text the API sent."""
+        content = content.encode() if isinstance(content, str) else content
+        if b"\n" in content:  # Keep the entry on one line
+            content = json.dumps(json.loads(content)).encode()
+        fetched_at = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+        line = b'{"params": %s, "fetched_at": "%s", "body": %s}\n' % (
+            json.dumps(params, sort_keys=True).encode(), fetched_at.encode(), content.strip())
+        data = gzip.compress(line, compresslevel=6)
+        name = self.entry_name(params)
+        self.store.write(name, data)
+        self.remember(name, data)
+        self.metrics.count("cache_bytes_written", len(data))
+
+    def replay(self):
+        """Every cached response body, newest first, whatever its age."""
+        for name, _, _ in sorted(self.store.list(), key=lambda entry: entry[2], reverse=True):
+            data = self.store.read(name)
+            if data is None:  # Pruned by another run in the meantime
+                continue
+            for line in gzip.decompress(data).splitlines():
+                yield json.loads(line)["body"]
+
+    def prune(self):
+        """Delete the oldest pages until the cache holds at most max_bytes. Returns how many were deleted."""
+        kept_bytes = 0
+        deleted = 0
+        for name, size, _ in sorted(self.store.list(), key=lambda entry: entry[2], reverse=True):
+            kept_bytes += size
+            if kept_bytes > self.max_bytes:
+                self.store.delete(name)
+                deleted += 1
+        self.metrics.count("cache_pages_pruned", deleted)
+        if deleted:
+            print(f"Pruned {deleted} pages from the response cache.")
+        return deleted
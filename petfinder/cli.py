@@ -0,0 +1,284 @@
+"""Command line entry point: python -m petfinder {daily,resume,backfill,replay,bench} [options].
+
+Only the standard library is imported up front. Each mode imports the parts of the package
+it needs when it runs, so --help and argument errors load neither pandas nor the Google Cloud
+libraries. The benchmark runs the real loader against in-memory fakes, so it imports pandas
+and google-cloud-bigquery (for the job configs) like the modes that load data.
+"""
+# Standard imports
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+
+# Constants
+DATASET_ID = "petfinder_data"
+TABLE_ID = "raw_petfinder"
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench")
+MAX_PAGE_SIZE = 100  # The API's limit, PAGE_LIMIT in petfinder.client
+
+
+def page_size(value):
+    """Parse --page-size, which the API accepts from 1 to MAX_PAGE_SIZE."""
+    size = int(value)
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {MAX_PAGE_SIZE}, got {size}")
+    return size
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="petfinder", description="Load Petfinder animals into GCS and BigQuery.")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    # Flags of every mode that fetches and loads; unset ones keep the defaults in the modules
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--max-requests", type=int, help="Request budget of each API key (default depends on the mode)")
+    common.add_argument("--workers", type=int, help="Most parallel page fetches")
+    common.add_argument("--page-size", type=page_size, help=f"Records per request, at most {MAX_PAGE_SIZE}")
+    common.add_argument("--format", choices=["parquet", "csv"],
+                        help="File format written to GCS; csv only with --sink gcs")
+    common.add_argument("--load-mode", choices=["append", "merge"], help="How files are loaded into raw_petfinder")
+    common.add_argument("--sink", choices=["bigquery", "gcs"], help="Load into BigQuery, or only upload to GCS")
+    common.add_argument("--state-path", default=os.getenv("STATE_PATH"),
+                        help="Local state file instead of the GCS state object")
+    common.add_argument("--cache", default=os.getenv("RESPONSE_CACHE"),
+                        help="Keep raw API responses in a local directory, or under cache/ in the bucket with 'gcs'")
+    common.add_argument("--cache-ttl", type=int, help="Seconds a cached page is used instead of fetching it again")
+
+    daily = modes.add_parser("daily", parents=[common], help="Load the pets published since the last run")
+    daily.add_argument("--sharded", action="store_true", default=os.getenv("SHARDED", "").lower() in ("1", "true"),
+                       help="Split the window by type, age, size and gender")
+    modes.add_parser("resume", parents=[common], help="Finish an interrupted daily run, without starting a new one")
+    backfill = modes.add_parser("backfill", parents=[common], help="Load the pets published in a date range")
+    backfill.add_argument("--from", dest="after", default=os.getenv("BACKFILL_FROM"),
+                          help="YYYY-MM-DD, defaults to 87 days before --to, or the saved range if neither is given")
+    backfill.add_argument("--to", dest="before", default=os.getenv("BACKFILL_TO"),
+                          help="YYYY-MM-DD, defaults to today, or the saved range if neither is given")
+    modes.add_parser("replay", parents=[common],
+                     help="Transform and load every page in the response cache again, without calling the API")
+    modes.add_parser("bench", add_help=False,
+                     help="Run bench/bench_pipeline.py against a local mock; its options are passed on")
+    return parser
+
+
+def options(args, **flags):
+    """Keyword arguments for the flags that were given, so the module defaults apply to the others."""
+    return {name: getattr(args, flag) for name, flag in flags.items() if getattr(args, flag) is not None}
+
+
+def start_logging(prefix):
+    """Structured JSON log lines for stage timings and the run report. Returns the run name."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    return f"{prefix}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+
+
+def make_client(args, metrics, **defaults):
+    """The Petfinder API client for the run, pooling the keys if there are several."""
+    from petfinder.client import load_credentials, create_client
+
+    credentials = load_credentials()  # One or more Petfinder API key pairs, each with its own daily budget
+    if not credentials:
+        raise ValueError("Missing required environment variables!")
+    kwargs = dict(defaults, **options(args, max_requests="max_requests", max_workers="workers", page_limit="page_size"))
+    return create_client(credentials, metrics=metrics, **kwargs)
+
+
+def make_loader(args, metrics, loader_class=None):
+    """The data loader for the run, with the bucket and service account from the environment."""
+    from petfinder.loader import PetFinderDataLoader
+
+    bucket_name = os.getenv("BUCKET")
+    credentials_json = os.getenv("GCS_CREDENTIALS")
+    if not bucket_name or not credentials_json:
+        raise ValueError("Missing required environment variables!")
+    project_id = json.loads(credentials_json).get("project_id")
+
+    loader_class = loader_class or PetFinderDataLoader
+    return loader_class(credentials_json, bucket_name, project_id, DATASET_ID, TABLE_ID, metrics=metrics,
+                        **options(args, output_format="format", load_mode="load_mode", sink="sink"))
+
+
+def make_cache(args, loader, metrics):
+    """The response cache selected by --cache, or None."""
+    if not args.cache:
+        return None
+    from petfinder.cache import ResponseCache, LocalCacheStore, GCSCacheStore
+
+    store = GCSCacheStore(loader.bucket) if args.cache == "gcs" else LocalCacheStore(args.cache)
+    return ResponseCache(store, metrics=metrics, **options(args, ttl="cache_ttl"))
+
+
+def daily(args, resume=False):
+    """Load the pets published since the watermark, finishing an interrupted run first.
+
+    With resume, only an interrupted run is finished, and nothing is fetched if there is none.
+    """
+    from petfinder.client import ShardPlanner
+    from petfinder.metrics import RunMetrics
+    from petfinder.state import LocalStateStore, GCSStateStore, IngestionState, ChangeIndex, CHANGE_INDEX_BLOB
+
+    run_name = start_logging("petfinder")
+    metrics = RunMetrics()  # Shared by the client and the loader
+    loader = make_loader(args, metrics)
+
+    # Only fetch pets published since the last load, or resume an interrupted run
+    state_store = LocalStateStore(args.state_path) if args.state_path else GCSStateStore(loader.bucket)
+    state = IngestionState(state_store).load()
+    if resume and state.run is None:
+        print("No interrupted run to resume.")
+        return
+
+    petfinder_client = make_client(args, metrics)
+    petfinder_client.cache = make_cache(args, loader, metrics)
+    petfinder_client.get_access_token()
+    # Split the window by type, age, size and gender; a sharded run is resumed sharded, with or without the flag
+    sharded = getattr(args, "sharded", False) if state.run is None else state.shards is not None
+    state.start_run(petfinder_client, ShardPlanner(petfinder_client) if sharded else None)
+
+    # Only upload and load pets that are new or changed since they were last loaded
+    index_store = LocalStateStore(f"{os.path.splitext(args.state_path)[0]}_change_index.npz") if args.state_path \
+        else GCSStateStore(loader.bucket, CHANGE_INDEX_BLOB)
+    loader.change_index = ChangeIndex(index_store).load()
+    print(f"Change index holds {len(loader.change_index)} pets.")
+
+    # Fetch pages using parallel requests and stream each one to Google Cloud Storage as it arrives
+    pages = petfinder_client.iter_shard_pages(state.shards) if state.shards is not None \
+        else petfinder_client.iter_pages()
+    succeeded = loader.stream_transform_upload(pages, run_name)
+    if succeeded:
+        state.finish_run(petfinder_client)
+        if loader.sink == "bigquery":  # With the gcs sink nothing was loaded, so the next run still sends these pets
+            loader.change_index.commit()
+            loader.change_index.save()
+    if petfinder_client.cache is not None:
+        petfinder_client.cache.prune()
+
+    # Where the run's time and request budget went, next to the data it loaded
+    loader.save_run_report(run_name, succeeded=succeeded, requests_remaining=petfinder_client.rate_limiter.remaining(),
+                           failed_pages=petfinder_client.failed_pages)
+
+
+def backfill(args):
+    """Load the pets published in [--from, --to), split into windows that later runs pick up where this one stopped."""
+    from concurrent.futures import ThreadPoolExecutor
+    from petfinder.backfill import (BackfillPlanner, PetFinderBackfillDataLoader, backfill_window, finish_window,
+                                    parse_date, MAX_REQUESTS_PER_DAY, LOOKBACK_DAYS, WINDOW_WORKERS,
+                                    BACKFILL_STATE_BLOB, TIME_FORMAT)
+    from petfinder.metrics import RunMetrics
+    from petfinder.state import LocalStateStore, GCSStateStore
+
+    run_name = start_logging("petfinder_backfill")
+    metrics = RunMetrics()  # Shared by the client, every window and the loader
+    petfinder_client = make_client(args, metrics, max_requests=MAX_REQUESTS_PER_DAY)
+    petfinder_client.get_access_token()
+    loader = make_loader(args, metrics, PetFinderBackfillDataLoader)
+    petfinder_client.cache = make_cache(args, loader, metrics)  # Shared by the window clients
+    state_store = LocalStateStore(args.state_path) if args.state_path \
+        else GCSStateStore(loader.bucket, BACKFILL_STATE_BLOB)
+
+    # Backfill range, [--from, --to). Without either, carry on with the saved range, so runs on later days
+    # don't replan from a new default range and fetch the loaded windows again
+    state = state_store.read() or {}
+    if args.after or args.before or not state:
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        before = parse_date(args.before or today)
+        after = parse_date(args.after or (before - timedelta(days=LOOKBACK_DAYS)).strftime("%Y-%m-%d"))
+    else:
+        after, before = parse_date(state["after"]), parse_date(state["before"])
+        print(f"Continuing the backfill of {state['after']} - {state['before']}.")
+
+    # Plan the windows once per range, saving them as they are counted; later runs pick up the
+    # ranges left to plan and the windows that are not done yet
+    if state.get("after") != after.strftime(TIME_FORMAT) or state.get("before") != before.strftime(TIME_FORMAT):
+        state = BackfillPlanner.new_state(after, before)
+        state_store.write(state)
+    if state.get("pending"):
+        BackfillPlanner(petfinder_client, state_store.write).plan(state)
+
+    todo = [window for window in state["windows"] if not window["done"]]
+    print(f"{len(todo)} of {len(state['windows'])} windows left to backfill.")
+
+    # Fetch windows in parallel, each into its own part, all drawing on the same request budget
+    workers = max(1, petfinder_client.max_workers // WINDOW_WORKERS)
+    with ThreadPoolExecutor(max_workers=WINDOW_WORKERS) as executor:
+        results = list(executor.map(
+            lambda window: backfill_window(petfinder_client, loader, window, workers, run_name), todo))
+
+    # Load every part in a single job, then record how far each window got, so later runs only fetch the rest
+    blob_names = [blob_name for _, blob_name in results if blob_name]
+    if blob_names:
+        loader.load_to_bigquery(blob_names)
+    finished = sum(finish_window(window, window_client) for window, (window_client, _) in zip(todo, results))
+    state_store.write(state)
+
+    if petfinder_client.cache is not None:
+        petfinder_client.cache.prune()
+
+    left = sum(not window["done"] for window in state["windows"])
+    print(f"Backfill run finished, {left} windows left.")
+    loader.save_run_report(run_name, windows_done=finished, windows_left=left,
+                           requests_remaining=petfinder_client.rate_limiter.remaining())
+
+
+def replay(args):
+    """Rebuild from the response cache: transform and load every cached page, spending no API requests.
+
+    Pages are read newest first and only the first row of each pet is kept, here in the order
+    they are read rather than in the loader's upload threads, so a pet cached by several runs
+    or queries is loaded as last fetched. The change index is bypassed, so unchanged pets are
+    loaded too.
+    """
+    from petfinder.metrics import RunMetrics
+    from petfinder.schema import project_pets
+
+    run_name = start_logging("petfinder_replay")
+    metrics = RunMetrics()
+    loader = make_loader(args, metrics)
+    cache = make_cache(args, loader, metrics)
+    if cache is None:
+        raise ValueError("replay needs --cache (or RESPONSE_CACHE) to read the responses from.")
+
+    def pages():
+        seen_ids = set()
+        for body in cache.replay():
+            records = project_pets(body["animals"])
+            metrics.count("pages_replayed")
+            metrics.count("records_fetched", len(records))
+            newest = []
+            for record in records:
+                if record[0] not in seen_ids:  # id
+                    seen_ids.add(record[0])
+                    newest.append(record)
+            metrics.count("dedup_dropped_records", len(records) - len(newest))
+            if newest:
+                yield newest
+
+    succeeded = loader.stream_transform_upload(pages(), run_name)
+    loader.save_run_report(run_name, succeeded=succeeded)
+
+
+def bench(argv):
+    """Run the end-to-end pipeline benchmark against in-memory fakes, which needs no credentials or network."""
+    sys.path.insert(0, BENCH_DIR)
+    import bench_pipeline
+
+    bench_pipeline.main(argv)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.mode == "bench":
+        return bench(extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.mode == "backfill":
+        backfill(args)
+    elif args.mode == "replay":
+        replay(args)
+    else:
+        daily(args, resume=args.mode == "resume")
@@ -0,0 +1,941 @@
+# Standard imports
+import asyncio
+import copy
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+
+# External imports
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Local imports
+from petfinder.metrics import RunMetrics, log_event
+from petfinder.schema import PUBLISHED_AT, project_pets
+
+
+# Constants
+MAX_REQUESTS_PER_DAY = 200  # Limit to 950 requests to stay safe
+PAGE_LIMIT = 100            # Max allowed records per request
+REQUESTS_PER_SECOND = 50    # Petfinder allows up to 50 requests per second
+LOOKBACK_DAYS = 1           # Fetch pets published in the last day
+MAX_WORKERS = 10            # Most parallel page fetches, also the size of the HTTP connection pool
+AIMD_SLOW_FACTOR = 4        # A response this many times slower than the fastest one seen counts as congestion
+AIMD_COOLDOWN = 1.0         # Seconds after a concurrency cut during which further congestion signals are ignored
+AIMD_LATENCY_WINDOW = 50    # Recent page responses whose fastest is the baseline for spotting slow ones
+AIMD_SLOW_MIN = 0.25        # Seconds under which no response counts as slow, so jitter on fast ones isn't congestion
+MAX_RETRIES = 5             # Retries for 429s, 5xx responses and connection errors
+BACKOFF_BASE = 1            # Seconds before the first retry, doubled on each attempt
+BACKOFF_MAX = 60            # Never wait longer than this between retries
+REQUEST_TIMEOUT = 30        # Seconds before an API request is abandoned
+SHARD_PAGES = 50            # In sharded mode, split any query partition that needs more pages than this
+SHARD_WORKERS = 4           # Shards fetched at the same time, sharing the workers and the request budget
+
+# Animals endpoint filters a window is sharded on, in order, with every value each one takes
+SHARD_FILTERS = [
+    ("type", ["Dog", "Cat", "Rabbit", "Small & Furry", "Horse", "Bird", "Scales, Fins & Other", "Barnyard"]),
+    ("age", ["Baby", "Young", "Adult", "Senior"]),
+    ("size", ["Small", "Medium", "Large", "XLarge"]),
+    ("gender", ["Male", "Female", "Unknown"]),
+]
+
+
+# Rate Limiter
+class RateLimiter:
+    """Token bucket with a daily request budget, safe to share across threads."""
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND, max_requests=MAX_REQUESTS_PER_DAY):
+        self.rate = requests_per_second
+        self.capacity = max(1, requests_per_second)  # Allow bursts of up to one second of requests
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.max_requests = max_requests
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    def is_exhausted(self):
+        """Check if the daily request budget has been used up."""
+        with self.lock:
+            return self.request_count >= self.max_requests
+
+    def remaining(self):
+        """Requests left in the daily budget."""
+        with self.lock:
+            return max(0, self.max_requests - self.request_count)
+
+    def try_acquire(self):
+        """Take a token without blocking.
+
+        Returns 0 if a request may be sent now, the seconds to wait for the next token,
+        or None once the daily budget is spent.
+        """
+        with self.lock:
+            if self.request_count >= self.max_requests:
+                return None
+
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.request_count += 1
+                return 0
+
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent. Returns False once the daily budget is spent."""
+        while True:
+            wait = self.try_acquire()
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait on the event loop until a request may be sent. Returns False once the daily budget is spent."""
+        while True:
+            wait = self.try_acquire()
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            await asyncio.sleep(wait)
+
+
+# Concurrency Controller
+class ConcurrencyController:
+    """AIMD limit on the requests in flight, tuned from observed latency, errors and 429s.
+
+    Every fast response adds 1/limit, about one more request in flight per round trip, up
+    to max_limit. A 429, 5xx, connection error or slow response halves the limit, at most
+    once per AIMD_COOLDOWN so one burst of failures counts as a single signal. Only page
+    responses are timed, against the fastest of the last AIMD_LATENCY_WINDOW of them, so
+    token requests and count probes don't set the baseline and it follows the API over time.
+    """
+
+    def __init__(self, max_limit=MAX_WORKERS, metrics=None):
+        self.max_limit = max_limit
+        self.current = float(max_limit)
+        self.latencies = deque(maxlen=AIMD_LATENCY_WINDOW)  # Recent page latencies, the fastest is the baseline
+        self.last_decrease = None
+        self.metrics = metrics
+        self.lock = threading.Lock()
+
+    def limit(self):
+        """Requests that may be in flight right now."""
+        return max(1, int(self.current))
+
+    def on_response(self, latency):
+        """Record a page response that was not throttled or failed."""
+        with self.lock:
+            baseline = min(self.latencies, default=latency)
+            self.latencies.append(latency)
+            if latency <= max(AIMD_SLOW_FACTOR * baseline, AIMD_SLOW_MIN):
+                self.current = min(self.max_limit, self.current + 1 / self.current)
+                return
+        self.on_congestion("slow response")
+
+    def on_congestion(self, reason):
+        """Record a 429, 5xx, connection error or slow response."""
+        with self.lock:
+            now = time.monotonic()
+            if self.last_decrease is not None and now - self.last_decrease < AIMD_COOLDOWN:
+                return
+            self.last_decrease = now
+            self.current = max(1.0, self.current / 2)
+            limit = self.limit()
+        if self.metrics is not None:
+            self.metrics.count("concurrency_decreases")
+        log_event("concurrency", limit=limit, reason=reason)
+
+
+# Access Token
+class AccessToken:
+    """The OAuth token of one API key and when it expires.
+
+    A client and the window and shard clients copied from it hold the same AccessToken, so a
+    token fetched or refreshed by any of them is used by all of them.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.expiration = None
+
+
+# Petfinder API Client
+class PetfinderAPIClient:
+    def __init__(self, client_id, client_secret, max_requests=MAX_REQUESTS_PER_DAY,
+                 requests_per_second=REQUESTS_PER_SECOND, lookback_days=LOOKBACK_DAYS, max_workers=MAX_WORKERS,
+                 metrics=None, page_limit=PAGE_LIMIT):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token = AccessToken()  # Shared by reference with the copies made by for_window
+        self.token_lock = threading.Lock()
+        self.token_url = "https://api.petfinder.com/v2/oauth2/token"
+        self.base_url = "https://api.petfinder.com/v2/animals"
+        self.lookback_days = lookback_days
+        self.max_workers = max_workers
+        self.page_limit = page_limit
+        self.rate_limiter = RateLimiter(requests_per_second, max_requests)  # Shared by all worker threads
+        self.session = self.create_session(max_workers)
+        self.failed_pages = []  # Pages that still failed after all retries
+        self.metrics = metrics or RunMetrics()  # Shared with the data loader to build one run report
+        self.concurrency = ConcurrencyController(max_workers, self.metrics)  # Shared by all worker threads
+
+        # Window and page progress, set by IngestionState to fetch only the delta since the last load
+        self.after = None           # Start of the published_at window (ISO 8601), defaults to the lookback
+        self.before = None          # End of the published_at window (ISO 8601), open-ended by default
+        self.filters = {}           # Extra animals query filters of the shard this client fetches, if any
+        self.cache = None           # Optional ResponseCache, read through before each page request
+        self.total_pages = None     # Pages in the window, known once the first page is fetched
+        self.fetched_pages = []     # Pages fetched successfully by this run
+        self.page_latest = {}       # Latest published_at on each fetched page, to find where a later run resumes
+        self.max_published_at = None  # Latest published_at among the fetched pets
+        self.progress_lock = threading.Lock()
+
+    @property
+    def request_count(self):
+        """Number of API requests sent so far."""
+        return self.rate_limiter.request_count
+
+    @property
+    def access_token(self):
+        return self.token.value
+
+    @access_token.setter
+    def access_token(self, value):
+        self.token.value = value
+
+    @property
+    def token_expiration(self):
+        return self.token.expiration
+
+    @token_expiration.setter
+    def token_expiration(self, value):
+        self.token.expiration = value
+
+    @staticmethod
+    def create_session(pool_size):
+        """Create a keep-alive HTTP session with one pooled connection per worker."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @staticmethod
+    def backoff_delay(attempt):
+        """Exponential backoff with full jitter for the given retry attempt."""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(headers):
+        """Seconds to wait according to a Retry-After header, or None if it is missing."""
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return min(BACKOFF_MAX, max(0.0, float(value)))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return min(BACKOFF_MAX, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+
+    def is_page_response(self, method, status, params):
+        """Whether a response is a full-size page of animals, the only kind whose latency tunes concurrency.
+
+        Token requests, 401s and limit=1 count probes return far less than a page, so timing
+        them would make every normal page look slow.
+        """
+        return method == "GET" and status == 200 and (params or {}).get("limit") == self.page_limit
+
+    def send_request(self, method, url, **kwargs):
+        """Send a rate-limited request, retrying 429s, 5xx responses and connection errors.
+
+        Returns None if the request budget runs out or the connection keeps failing.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.rate_limiter.acquire():
+                return None
+
+            self.metrics.count("requests")
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.count("connection_errors")
+                self.concurrency.on_congestion("connection error")
+                if attempt == MAX_RETRIES:
+                    print(f"Request to {url} failed after {MAX_RETRIES} retries: {e}")
+                    return None
+                delay = self.backoff_delay(attempt)
+                print(f"Request to {url} failed ({e}), retrying in {delay:.1f}s...")
+            else:
+                latency = time.perf_counter() - start
+                self.metrics.observe("request_seconds", latency)
+                self.metrics.count("bytes_downloaded", len(response.content))
+                if response.status_code == 429:
+                    self.metrics.count("throttled_429")
+                    self.concurrency.on_congestion("429")
+                elif response.status_code >= 500:
+                    self.metrics.count("server_errors_5xx")
+                    self.concurrency.on_congestion(str(response.status_code))
+                else:
+                    if self.is_page_response(method, response.status_code, kwargs.get("params")):
+                        self.concurrency.on_response(latency)
+                    return response
+                if attempt == MAX_RETRIES:
+                    return response
+                delay = self.retry_after(response.headers) if response.status_code == 429 else None
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                print(f"Request to {url} returned {response.status_code}, retrying in {delay:.1f}s...")
+
+            self.metrics.count("retries")
+            time.sleep(delay)
+
+    def get_access_token(self):
+        """Request and retrieve the access token from Petfinder API."""
+        data = {
+            'grant_type': 'client_credentials',
+            'client_id': self.client_id,
+            'client_secret': self.client_secret
+        }
+
+        response = self.send_request("POST", self.token_url, data=data)
+
+        if response is None:
+            print("Request limit reached. Cannot fetch access token.")
+        elif response.status_code == 200:
+            token_data = response.json()
+            self.access_token = token_data['access_token']
+            expires_in = token_data['expires_in']
+            self.token_expiration = time.time() + expires_in
+            self.metrics.count("access_tokens")
+            print("Successfully fetched access token.")
+        else:
+            print(f"Failed to retrieve access token: {response.status_code}, {response.text}")
+
+    def is_token_expired(self):
+        """Check if the current access token has expired."""
+        return self.token_expiration is None or time.time() > self.token_expiration
+
+    def refresh_access_token(self):
+        """Refresh the access token if expired, once for all worker threads."""
+        with self.token_lock:
+            if self.is_token_expired():
+                print("Access token expired, refreshing token...")
+                self.get_access_token()
+
+    def fetch_animals(self, params):
+        """GET the animals endpoint, refreshing the token once if it is rejected."""
+        self.refresh_access_token()
+        token = self.access_token
+        response = self.send_request("GET", self.base_url, headers={"Authorization": f"Bearer {token}"},
+                                     params=params)
+
+        if response is not None and response.status_code == 401:
+            self.metrics.count("unauthorized_401")
+            with self.token_lock:
+                if self.access_token == token:  # Another worker may have refreshed it already
+                    print("Access token rejected, refreshing token...")
+                    self.get_access_token()
+            response = self.send_request("GET", self.base_url,
+                                         headers={"Authorization": f"Bearer {self.access_token}"}, params=params)
+
+        return response
+
+    # NEW
+    def fetch_total_count(self):
+        """Number of pets in the window, for planning backfill windows. None if the budget is spent."""
+        response = self.fetch_animals(dict(self.page_params(1), limit=1))
+
+        if response is None:
+            print("Request limit reached. Stopping data fetch.")
+            return None
+        elif response.status_code == 200:
+            return response.json()["pagination"]["total_count"]
+        else:
+            raise Exception(f"Error fetching total count: {response.text}")
+
+    def page_params(self, page):
+        """Query parameters for one page of the window."""
+        if self.after is None:
+            # Calculate the date and time for the start of the lookback window
+            self.after = (datetime.now(timezone.utc) - timedelta(days=self.lookback_days)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ")
+        # Oldest first, so pets published during or between runs don't shift earlier pages
+        params = {"limit": self.page_limit, "page": page, "after": self.after, "sort": "-recent", **self.filters}
+        if self.before is not None:
+            params["before"] = self.before
+        return params
+
+    def for_window(self, after, before):
+        """A client for one published_at window that shares this client's session, token and request budget.
+
+        The copy holds the same AccessToken and token_lock, so a refresh by either client is seen by both.
+        """
+        client = copy.copy(self)
+        client.after = after
+        client.before = before
+        client.total_pages = None
+        client.fetched_pages = []
+        client.page_latest = {}
+        client.failed_pages = []
+        client.max_published_at = None
+        client.progress_lock = threading.Lock()
+        return client
+
+    def for_shard(self, filters):
+        """A client for one query partition of this client's window, sharing its session, token and budget."""
+        client = self.for_window(self.after, self.before)
+        client.filters = dict(filters)
+        return client
+
+    def pages_to_fetch(self):
+        """Pages of the window not fetched yet, capped by the request budget."""
+        done = set(self.fetched_pages)
+        pages = [page for page in range(1, self.total_pages + 1) if page not in done]
+        return pages[:self.rate_limiter.remaining()]
+
+    def is_complete(self):
+        """Whether every page of the window was fetched."""
+        with self.progress_lock:
+            return self.total_pages is not None and set(self.fetched_pages).issuperset(range(1, self.total_pages + 1))
+
+    def resume_after(self):
+        """Where a later run should restart the window, as an `after` value, or None if there was no progress.
+
+        Pages are numbered over the pets still adoptable, so they shift between runs as pets
+        on earlier pages are adopted, and skipping page numbers would miss pets. A later run
+        restarts at page 1 after the latest published_at on the pages fetched without a gap
+        from page 1. A second is taken off, so pets sharing that published_at are fetched
+        again rather than missed; the staging model keeps one row per pet.
+        """
+        with self.progress_lock:
+            fetched = set(self.fetched_pages)
+            last_page = 0
+            while last_page + 1 in fetched:
+                last_page += 1
+            latest = max(filter(None, (self.page_latest.get(page) for page in range(1, last_page + 1))), default=None)
+        if latest is None:
+            return None
+        return (latest - timedelta(seconds=1)).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def past_end(self, page):
+        """Whether the window is known to end before this page."""
+        return self.total_pages is not None and page > self.total_pages
+
+    def record_page(self, page, records, pagination=None):
+        """Remember a successfully fetched page, the latest published_at on it and where the window ends.
+
+        The first pagination block seen gives the number of pages, so no request is spent on
+        counting them. A short or empty page means the window ends there, even if pets were
+        removed since the count was taken.
+        """
+        latest = max((datetime.strptime(record[PUBLISHED_AT], "%Y-%m-%dT%H:%M:%S%z")
+                      for record in records if record[PUBLISHED_AT]), default=None)
+        self.metrics.count("pages_fetched")
+        self.metrics.count("records_fetched", len(records))
+        with self.progress_lock:
+            self.fetched_pages.append(page)
+            self.page_latest[page] = latest
+            if latest is not None and (self.max_published_at is None or latest > self.max_published_at):
+                self.max_published_at = latest
+            if self.total_pages is None and pagination is not None:
+                self.total_pages = -(-pagination["total_count"] // self.page_limit)
+            if len(records) < self.page_limit:
+                last_page = page if records else page - 1
+                self.total_pages = last_page if self.total_pages is None else min(self.total_pages, last_page)
+
+    def fetch_page(self, page):
+        """One page of animals, projected to row tuples (see project_pets) as soon as it is parsed.
+
+        With a response cache, a fresh cached copy of the page is used instead of a request,
+        and every page fetched is added to the cache.
+        """
+        if self.past_end(page):
+            return []
+        params = self.page_params(page)
+        data = self.cache.get(params) if self.cache is not None else None
+        if data is None:
+            if self.rate_limiter.is_exhausted():
+                return []
+            response = self.fetch_animals(params)
+            if response is None or response.status_code != 200:
+                error = None if response is None else f"{response.status_code}, {response.text}"
+                return self.page_failed(page, error)
+            data = response.json()
+            if self.cache is not None:
+                self.cache.put(params, response.content)
+
+        records = project_pets(data["animals"])
+        self.record_page(page, records, data.get("pagination"))
+        return records
+
+    def page_failed(self, page, error=None):
+        """Record a page that could not be fetched, unless it only went unfetched for lack of budget."""
+        if error is not None:
+            print(f"Failed to fetch page {page}: {error}")
+        if not self.rate_limiter.is_exhausted():
+            self.failed_pages.append(page)
+            self.metrics.count("pages_failed")
+        return []
+
+    def iter_pages(self, max_workers=None):
+        """Yield each page of pet records as soon as it arrives.
+
+        The first page is fetched alone and its pagination block sizes the window.
+        The rest are fetched with as many requests in flight as the concurrency controller
+        allows, at most max_workers, so memory stays bounded however many pages the run pulls.
+        Nothing past a short or empty page is requested. Only the time spent fetching or
+        waiting for pages counts towards the fetch stage, not the time the consumer holds a page.
+        """
+        max_workers = max_workers or self.max_workers
+        record_count = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with self.metrics.stage("fetch"):
+                pets = self.fetch_page(1)
+            if self.total_pages is None:
+                print("Could not fetch the first page. Stopping data fetch.")
+                return
+            record_count += len(pets)
+            yield pets
+
+            pages = iter(self.pages_to_fetch())
+            print(f"Fetching up to {self.total_pages} pages of data...")
+            pending = set()
+            while True:
+                while len(pending) < min(max_workers, self.concurrency.limit()):
+                    page = next(pages, None)
+                    if page is None or self.past_end(page):
+                        pages = iter(())
+                        break
+                    pending.add(executor.submit(self.fetch_page, page))
+                if not pending:
+                    break
+
+                with self.metrics.stage("fetch"):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pets = future.result()
+                    record_count += len(pets)
+                    yield pets
+
+                if self.rate_limiter.is_exhausted():
+                    if next(pages, None) is not None:
+                        print("Reached API request limit, stopping further requests.")
+                    pages = iter(())
+
+        if self.failed_pages:
+            self.failed_pages.sort()
+            print(f"Pages that failed after retries: {self.failed_pages}")
+        print(f"Total records fetched: {record_count}")
+
+    def finish_shard(self, shard, client):
+        """Record whether a shard is now complete, and if not, where the next run resumes it.
+
+        The shard's failed pages are added to this client's, each with the shard's filters,
+        since page numbers are only meaningful within their shard.
+        """
+        done, resume_after = client.is_complete(), client.resume_after()
+        with self.progress_lock:
+            self.failed_pages.extend(dict(shard["filters"], page=page) for page in sorted(client.failed_pages))
+            shard["done"] = done
+            if not done and resume_after is not None:
+                shard["resume_after"] = max(filter(None, [shard.get("resume_after"), resume_after]))
+            if client.max_published_at is not None and \
+                    (self.max_published_at is None or client.max_published_at > self.max_published_at):
+                self.max_published_at = client.max_published_at
+        log_event("shard", filters=shard["filters"], total_count=shard["total_count"],
+                  fetched_pages=len(client.fetched_pages), done=shard["done"])
+
+    def iter_shard_pages(self, shards, shard_workers=SHARD_WORKERS):
+        """Yield the pages of every unfinished shard, fetching several shards at a time.
+
+        Each shard runs iter_pages on its own client, so it is sized, paginated and retried
+        on its own, and a shard stuck on a failing page doesn't hold back the others. An
+        unfinished shard records where to resume, so the next run only fetches what is left.
+        """
+        todo = [shard for shard in shards if not shard["done"]]
+        workers = max(1, self.max_workers // shard_workers)
+        pages = queue.Queue(maxsize=shard_workers * 2)  # Bounds the pages waiting for the consumer
+        stopped = threading.Event()
+        print(f"Fetching {len(todo)} of {len(shards)} shards...")
+
+        def fetch_shard(shard):
+            client = self.for_shard(shard["filters"])
+            client.after = shard.get("resume_after") or client.after
+            try:
+                for pets in client.iter_pages(workers):
+                    if stopped.is_set():
+                        break
+                    pages.put(pets)
+            finally:
+                self.finish_shard(shard, client)
+                pages.put(None)  # This shard is finished
+
+        with ThreadPoolExecutor(max_workers=shard_workers) as executor:
+            futures = [executor.submit(fetch_shard, shard) for shard in todo]
+            finished = 0
+            try:
+                while finished < len(futures):
+                    pets = pages.get()
+                    if pets is None:
+                        finished += 1
+                    else:
+                        yield pets
+            finally:
+                # If the consumer stopped early, drop the shards not started and unblock the running ones
+                stopped.set()
+                started = [future for future in futures if not future.cancel()]
+                while finished < len(started):
+                    finished += pages.get() is None
+            for future in started:
+                future.result()  # Raise any shard's error
+
+        print(f"{sum(shard['done'] for shard in shards)} of {len(shards)} shards complete.")
+
+    def fetch_all_data(self, max_workers=None):
+        """Fetch every page into a single list of pet records."""
+        all_pets = []
+        for pets in self.iter_pages(max_workers):
+            all_pets.extend(pets)
+        return all_pets
+
+    # Asyncio engine, an alternative to the ThreadPoolExecutor path above
+    async def send_request_async(self, session, method, url, **kwargs):
+        """Async version of send_request. Returns (status, headers, body text) or None."""
+        import aiohttp
+
+        for attempt in range(MAX_RETRIES + 1):
+            if not await self.rate_limiter.acquire_async():
+                return None
+
+            self.metrics.count("requests")
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    status, headers, content = response.status, response.headers, await response.read()
+                    body = await response.text()  # Decodes the body read above, without a second read
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.metrics.count("connection_errors")
+                self.concurrency.on_congestion("connection error")
+                if attempt == MAX_RETRIES:
+                    print(f"Request to {url} failed after {MAX_RETRIES} retries: {e}")
+                    return None
+                delay = self.backoff_delay(attempt)
+                print(f"Request to {url} failed ({e!r}), retrying in {delay:.1f}s...")
+            else:
+                latency = time.perf_counter() - start
+                self.metrics.observe("request_seconds", latency)
+                self.metrics.count("bytes_downloaded", len(content))
+                if status == 429:
+                    self.metrics.count("throttled_429")
+                    self.concurrency.on_congestion("429")
+                elif status >= 500:
+                    self.metrics.count("server_errors_5xx")
+                    self.concurrency.on_congestion(str(status))
+                else:
+                    if self.is_page_response(method, status, kwargs.get("params")):
+                        self.concurrency.on_response(latency)
+                    return status, headers, body
+                if attempt == MAX_RETRIES:
+                    return status, headers, body
+                delay = self.retry_after(headers) if status == 429 else None
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                print(f"Request to {url} returned {status}, retrying in {delay:.1f}s...")
+
+            self.metrics.count("retries")
+            await asyncio.sleep(delay)
+
+    async def get_access_token_async(self, session):
+        """Async version of get_access_token."""
+        data = {
+            'grant_type': 'client_credentials',
+            'client_id': self.client_id,
+            'client_secret': self.client_secret
+        }
+
+        result = await self.send_request_async(session, "POST", self.token_url, data=data)
+
+        if result is None:
+            print("Request limit reached. Cannot fetch access token.")
+        elif result[0] == 200:
+            token_data = json.loads(result[2])
+            self.access_token = token_data['access_token']
+            self.token_expiration = time.time() + token_data['expires_in']
+            self.metrics.count("access_tokens")
+            print("Successfully fetched access token.")
+        else:
+            print(f"Failed to retrieve access token: {result[0]}, {result[2]}")
+
+    async def fetch_animals_async(self, session, token_lock, params):
+        """Async version of fetch_animals. One refresh is shared by all waiting tasks."""
+        async with token_lock:
+            if self.is_token_expired():
+                print("Access token expired, refreshing token...")
+                await self.get_access_token_async(session)
+        token = self.access_token
+
+        result = await self.send_request_async(session, "GET", self.base_url,
+                                               headers={"Authorization": f"Bearer {token}"}, params=params)
+
+        if result is not None and result[0] == 401:
+            self.metrics.count("unauthorized_401")
+            async with token_lock:
+                if self.access_token == token:  # Another task may have refreshed it already
+                    print("Access token rejected, refreshing token...")
+                    await self.get_access_token_async(session)
+            result = await self.send_request_async(session, "GET", self.base_url,
+                                                   headers={"Authorization": f"Bearer {self.access_token}"},
+                                                   params=params)
+
+        return result
+
+    async def fetch_page_async(self, session, token_lock, slots, page):
+        """Async version of fetch_page, waiting for a free slot under the concurrency limit."""
+        async with slots:
+            await slots.wait_for(lambda: slots.in_flight < self.concurrency.limit())
+            slots.in_flight += 1
+        try:
+            if self.past_end(page):
+                return []
+            params = self.page_params(page)
+            data = await asyncio.to_thread(self.cache.get, params) if self.cache is not None else None
+            if data is None:
+                if self.rate_limiter.is_exhausted():
+                    return []
+                result = await self.fetch_animals_async(session, token_lock, params)
+                if result is None or result[0] != 200:
+                    return self.page_failed(page, None if result is None else f"{result[0]}, {result[2]}")
+                data = json.loads(result[2])
+                if self.cache is not None:
+                    await asyncio.to_thread(self.cache.put, params, result[2])
+        finally:
+            async with slots:
+                slots.in_flight -= 1
+                slots.notify_all()
+
+        records = project_pets(data["animals"])
+        self.record_page(page, records, data.get("pagination"))
+        return records
+
+    async def fetch_all_data_async(self, max_concurrency=None):
+        """Fetch all pages on one event loop over a single aiohttp connection pool."""
+        import aiohttp
+
+        max_concurrency = max_concurrency or self.max_workers
+        connector = aiohttp.TCPConnector(limit=max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        token_lock = asyncio.Lock()
+        slots = asyncio.Condition()  # Requests in flight, bounded by the adaptive concurrency limit
+        slots.in_flight = 0
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            with self.metrics.stage("fetch"):
+                first = await self.fetch_page_async(session, token_lock, slots, 1)
+                if self.total_pages is None:
+                    print("Could not fetch the first page. Stopping data fetch.")
+                    return []
+
+                print(f"Fetching up to {self.total_pages} pages of data...")
+                pages = await asyncio.gather(*(self.fetch_page_async(session, token_lock, slots, page)
+                                               for page in self.pages_to_fetch()))
+
+        all_pets = first + [pet for page in pages for pet in page]
+        if self.failed_pages:
+            print(f"Pages that failed after retries: {sorted(self.failed_pages)}")
+        print(f"Total records fetched: {len(all_pets)}")
+        return all_pets
+
+
+class PoolBudget:
+    """Combined request budget of several clients, so a pool plans its pages like a single client."""
+
+    def __init__(self, clients):
+        self.clients = clients
+
+    @property
+    def request_count(self):
+        return sum(client.rate_limiter.request_count for client in self.clients)
+
+    def is_exhausted(self):
+        return all(client.rate_limiter.is_exhausted() for client in self.clients)
+
+    def remaining(self):
+        return sum(client.rate_limiter.remaining() for client in self.clients)
+
+
+# Petfinder API Client Pool
+class PetfinderClientPool(PetfinderAPIClient):
+    """Fetch with several Petfinder API keys at once, to go beyond one key's daily quota.
+
+    Each (client_id, client_secret) pair gets its own PetfinderAPIClient, with its own token
+    and request budget. The pool plans, tracks and resumes windows exactly like a single
+    client, and sends each request with the key that has the most budget left, so one run
+    can pull as many pages as all the keys' budgets together.
+    """
+
+    def __init__(self, credentials, max_requests=MAX_REQUESTS_PER_DAY, requests_per_second=REQUESTS_PER_SECOND,
+                 lookback_days=LOOKBACK_DAYS, max_workers=None, metrics=None, page_limit=PAGE_LIMIT):
+        max_workers = max_workers or MAX_WORKERS * len(credentials)
+        super().__init__(None, None, max_requests, requests_per_second, lookback_days, max_workers, metrics,
+                         page_limit)
+        self.clients = [PetfinderAPIClient(client_id, client_secret, max_requests, requests_per_second,
+                                           lookback_days, max_workers, self.metrics, page_limit)
+                        for client_id, client_secret in credentials]
+        for client in self.clients:
+            client.concurrency = self.concurrency  # One limit for the pool, fed by the responses to every key
+        self.rate_limiter = PoolBudget(self.clients)
+
+    def get_access_token(self):
+        """Fetch an access token for every key."""
+        for client in self.clients:
+            client.get_access_token()
+
+    def fetch_animals(self, params):
+        """GET the animals endpoint with the key that has the most budget left, moving on if it runs out."""
+        for client in sorted(self.clients, key=lambda client: client.rate_limiter.remaining(), reverse=True):
+            response = client.fetch_animals(params)
+            if response is not None or not client.rate_limiter.is_exhausted():
+                return response
+        return None
+
+    async def get_access_token_async(self, session):
+        """Async version of get_access_token, fetching a token for every key."""
+        for client in self.clients:
+            await client.get_access_token_async(session)
+
+    async def fetch_animals_async(self, session, token_lock, params):
+        """Async version of fetch_animals, with the key that has the most budget left.
+
+        Each key refreshes its own token through the member client, so fetch_all_data_async
+        runs on the pool like on a single client.
+        """
+        for client in sorted(self.clients, key=lambda client: client.rate_limiter.remaining(), reverse=True):
+            result = await client.fetch_animals_async(session, token_lock, params)
+            if result is not None or not client.rate_limiter.is_exhausted():
+                return result
+        return None
+
+
+# Shard Planner
+class ShardPlanner:
+    """Split the client's window into query partitions by SHARD_FILTERS that each need few pages.
+
+    A shard over max_pages is split by the next filter, and each part is counted again, so
+    only the busy partitions (e.g. dogs, then adult dogs) are split further. A split is only
+    kept when the parts add up to the shard's count, so a filter value missing from
+    SHARD_FILTERS can never drop animals; such a shard is fetched whole instead.
+
+    Planning is kept in the run as it goes: partitions still to be counted or split wait in
+    run["pending"], finished shards are added to run["shards"], and the run is saved after
+    every count. Counting stops when the request budget runs out, and the next run carries
+    on from the pending partitions instead of starting over.
+    """
+
+    def __init__(self, client, max_pages=SHARD_PAGES):
+        self.client = client
+        self.max_pages = max_pages
+
+    def count(self, filters):
+        """Number of pets in the partition, one request each. None if the budget is spent."""
+        if self.client.rate_limiter.remaining() == 0:
+            return None
+        return self.client.for_shard(filters).fetch_total_count()
+
+    @staticmethod
+    def partition(filters, depth):
+        """A partition of the window waiting to be counted, split by the first depth SHARD_FILTERS."""
+        return {"filters": filters, "depth": depth, "total_count": None}
+
+    @staticmethod
+    def shard(filters, total):
+        """A new shard, fetched from the start of the window."""
+        return {"filters": filters, "total_count": total, "resume_after": None, "done": False}
+
+    def plan(self, run, save):
+        """Count and split the pending partitions of the run into shards. Returns whether planning is finished.
+
+        save is called with the run after each count.
+        """
+        pending, shards = run.setdefault("pending", []), run.setdefault("shards", [])
+        while pending:
+            partition = pending[-1]
+            if partition["total_count"] is None:
+                partition["total_count"] = self.count(partition["filters"])
+                if partition["total_count"] is None:
+                    break
+                save(run)
+
+            filters, total, depth = partition["filters"], partition["total_count"], partition["depth"]
+            if -(-total // self.client.page_limit) <= self.max_pages or depth == len(SHARD_FILTERS):
+                pending.pop()
+                shards.append(self.shard(filters, total))
+                save(run)
+                continue
+
+            name, values = SHARD_FILTERS[depth]
+            parts = partition.setdefault("parts", [self.partition(dict(filters, **{name: value}), depth + 1)
+                                                   for value in values])
+            for part in parts:
+                if part["total_count"] is None:
+                    part["total_count"] = self.count(part["filters"])
+                    if part["total_count"] is None:
+                        break
+                    save(run)
+            if any(part["total_count"] is None for part in parts):
+                break
+
+            pending.pop()
+            counted = sum(part["total_count"] for part in parts)
+            if counted != total:
+                print(f"Shard {filters} doesn't split exactly by {name} ({counted} of {total} pets), "
+                      f"fetching it whole.")
+                shards.append(self.shard(filters, total))
+            else:
+                pending.extend(part for part in parts if part["total_count"])
+            save(run)
+
+        print(f"Planned {len(shards)} shards for {sum(shard['total_count'] for shard in shards)} pets"
+              + (f", {len(pending)} partitions left to plan by the next run." if pending else "."))
+        return not pending
+
+
+def load_credentials():
+    """Petfinder API key pairs from the environment.
+
+    PETFINDER_CLIENT_ID and PETFINDER_CLIENT_SECRET, plus any pairs in the optional
+    PETFINDER_CREDENTIALS, a JSON list of {"client_id": ..., "client_secret": ...} objects.
+    """
+    credentials = []
+    if os.getenv("PETFINDER_CLIENT_ID") and os.getenv("PETFINDER_CLIENT_SECRET"):
+        credentials.append((os.getenv("PETFINDER_CLIENT_ID"), os.getenv("PETFINDER_CLIENT_SECRET")))
+    for pair in json.loads(os.getenv("PETFINDER_CREDENTIALS") or "[]"):
+        if (pair["client_id"], pair["client_secret"]) not in credentials:
+            credentials.append((pair["client_id"], pair["client_secret"]))
+    return credentials
+
+
+def create_client(credentials, **kwargs):
+    """A client for a single key pair, or a pool that shares the run across several."""
+    if len(credentials) == 1:
+        return PetfinderAPIClient(*credentials[0], **kwargs)
+    return PetfinderClientPool(credentials, **kwargs)
@@ -0,0 +1,476 @@
+# Standard imports
+import json
+import logging
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+# External imports
+import pandas as pd
+
+
+# Local imports
+from petfinder.metrics import RunMetrics, log_event
+from petfinder.schema import RAW_COLUMNS, TABLE_SCHEMA, TABLE_COLUMNS, PARTITION_FIELD, CLUSTERING_FIELDS, \
+    CATEGORICAL_COLUMNS, project_pets
+
+
+# Constants
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Bytes buffered per resumable upload request (multiple of 256 KiB)
+OUTPUT_FORMAT = "parquet"   # "parquet" (typed, compressed, loadable) or "csv" (only with the "gcs" sink)
+PARQUET_ROW_GROUP_SIZE = 10000  # Rows buffered before a Parquet row group is written
+LOAD_MODE = "append"        # "append" (deduplicated by the incremental staging model) or "merge" (upsert on id)
+SINK = "bigquery"           # "bigquery" (upload to GCS, then load) or "gcs" (upload only, to load elsewhere)
+PAGES_PER_PART = 20         # Pages transformed and uploaded together as one GCS object
+UPLOAD_WORKERS = 2          # Parts transformed and uploaded in the background while fetching continues
+REPORT_PREFIX = "reports"   # JSON run reports, kept next to the data
+
+
+def arrow_schema():
+    """TABLE_SCHEMA as a pyarrow schema, for writing Parquet."""
+    import pyarrow as pa
+
+    types = {"INTEGER": pa.int64(), "STRING": pa.string(), "BOOLEAN": pa.bool_(),
+             "TIMESTAMP": pa.timestamp("us", tz="UTC")}
+    return pa.schema([
+        pa.field(name, pa.list_(types[field_type]) if mode == "REPEATED" else types[field_type])
+        for name, field_type, mode in TABLE_SCHEMA
+    ])
+
+
+def bigquery_schema():
+    """TABLE_SCHEMA as BigQuery schema fields."""
+    from google.cloud import bigquery
+
+    return [bigquery.SchemaField(name, field_type, mode=mode) for name, field_type, mode in TABLE_SCHEMA]
+
+
+def time_partitioning():
+    """Daily partitioning of raw_petfinder on the load time."""
+    from google.cloud import bigquery
+
+    return bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.DAY, field=PARTITION_FIELD)
+
+
+class CountingWriter:
+    """Pass writes through to a binary file object, counting the bytes into the run metrics."""
+
+    def __init__(self, f, metrics):
+        self.f = f
+        self.metrics = metrics
+
+    def write(self, data):
+        self.metrics.count("bytes_uploaded", len(data))
+        return self.f.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+# PetFinder Data Loader
+# TESTING added last 3 variables
+class PetFinderDataLoader:
+    def __init__(self, credentials_json: str, bucket_name: str, project_id: str, dataset_id: str, table_id: str,
+                 output_format: str = OUTPUT_FORMAT, load_mode: str = LOAD_MODE, sink: str = SINK,
+                 storage_client=None, bigquery_client=None, metrics=None, change_index=None):
+        """Initialize Google Cloud Storage client using secrets.
+
+        Ready-made storage and BigQuery clients can be passed instead, e.g. local fakes for benchmarks.
+        """
+        if storage_client is None or bigquery_client is None:
+            from google.cloud import storage, bigquery
+            from google.oauth2.service_account import Credentials
+
+            credentials_dict = json.loads(credentials_json)
+            credentials = Credentials.from_service_account_info(credentials_dict)
+            storage_client = storage_client or storage.Client(credentials=credentials)
+            bigquery_client = bigquery_client or bigquery.Client(credentials=credentials, project=project_id)
+        self.storage_client = storage_client
+        self.bucket = self.storage_client.bucket(bucket_name)
+        self.bigquery_client = bigquery_client
+
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+
+        if output_format not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.output_format = output_format
+
+        if load_mode not in ("merge", "append"):
+            raise ValueError(f"Unsupported load mode: {load_mode}")
+        self.load_mode = load_mode
+
+        if sink not in ("bigquery", "gcs"):
+            raise ValueError(f"Unsupported sink: {sink}")
+        if sink == "bigquery" and output_format != "parquet":
+            # raw_petfinder and the dbt models downstream expect TABLE_SCHEMA's types, e.g. tags as an array
+            raise ValueError("CSV can't be loaded into BigQuery; use the parquet format or the gcs sink.")
+        self.sink = sink
+
+        self.metrics = metrics or RunMetrics()  # Pass the API client's metrics to get one report per run
+        self.change_index = change_index  # Optional ChangeIndex; unchanged pets are then dropped before upload
+        self.loaded_at = datetime.now(timezone.utc)  # Stamped on every row, so a run writes to a single partition
+
+
+    def transform_to_dataframe(self, pet_data):
+        """Convert pet records to a Pandas DataFrame.
+
+        Takes the row tuples the API client projects each page to, or raw pet JSON, which is
+        projected first, and builds the DataFrame from the tuples in one call, with the
+        low-cardinality columns as categoricals. With a change index, rows identical to the
+        ones already loaded are dropped first. Every row is stamped with the run's loaded_at.
+        """
+        with self.metrics.stage("transform"):
+            rows = pet_data if pet_data and isinstance(pet_data[0], tuple) else self.flatten_rows(pet_data)
+            if self.change_index is not None:
+                record_count = len(rows)
+                rows = self.change_index.filter(rows)
+                self.metrics.count("records_unchanged", record_count - len(rows))
+            df = self.rows_to_dataframe(rows)
+            df["loaded_at"] = pd.Timestamp(self.loaded_at)
+        self.metrics.count("records_transformed", len(df))
+        return df
+
+    @staticmethod
+    def rows_to_dataframe(rows):
+        """Row tuples in RAW_COLUMNS order as a DataFrame, with categorical low-cardinality columns."""
+        df = pd.DataFrame.from_records(rows, columns=RAW_COLUMNS)
+        return df.astype({column: "category" for column in CATEGORICAL_COLUMNS})
+
+    @classmethod
+    def flatten(cls, pet_data):
+        """One row per pet, in RAW_COLUMNS order, as a DataFrame."""
+        return cls.rows_to_dataframe(cls.flatten_rows(pet_data))
+
+    @staticmethod
+    def flatten_rows(pet_data):
+        """One row tuple per pet, in RAW_COLUMNS order."""
+        return project_pets(pet_data)
+
+    def save_csv_to_gcs(self, df, blob_name):
+        """Upload CSV to Google Cloud Storage."""
+        with self.metrics.stage("upload"):
+            csv_data = df.to_csv(index=False).encode()
+            blob = self.bucket.blob(blob_name)
+            blob.upload_from_string(csv_data, "text/csv")
+        self.metrics.count("bytes_uploaded", len(csv_data))
+        self.metrics.count("records_uploaded", len(df))
+        print(f"CSV uploaded to {blob_name}")
+
+    def stream_csv_to_gcs(self, pages, blob_name):
+        """Transform pages as they arrive and write them to GCS through a resumable upload.
+
+        Only one page and one upload chunk are held in memory at a time. Returns the number
+        of rows written; no object is created if there were none.
+        """
+        row_count = 0
+        writer = None
+        try:
+            for pets in pages:
+                df = self.transform_to_dataframe(pets)
+                if df.empty:
+                    continue
+                if writer is None:
+                    blob = self.bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
+                    writer = blob.open("w", content_type="text/csv")
+                csv_data = df.to_csv(index=False, header=row_count == 0)
+                with self.metrics.stage("upload"):
+                    writer.write(csv_data)
+                self.metrics.count("bytes_uploaded", len(csv_data.encode()))
+                row_count += len(df)
+        finally:
+            if writer is not None:
+                with self.metrics.stage("upload"):  # Closing sends the last chunk and finalizes the upload
+                    writer.close()
+
+        self.metrics.count("records_uploaded", row_count)
+        if row_count:
+            print(f"CSV streamed to {blob_name} ({row_count} rows)")
+        return row_count
+
+    def to_arrow_table(self, df):
+        """Convert a transformed DataFrame to a pyarrow Table typed by TABLE_SCHEMA."""
+        import pyarrow as pa
+
+        df = df.assign(
+            published_at=pd.to_datetime(df["published_at"], utc=True, errors="coerce"),
+            tags=df["tags"].map(lambda tags: list(tags) if isinstance(tags, (list, tuple)) else []),
+        )
+        return pa.Table.from_pandas(df, schema=arrow_schema(), preserve_index=False)
+
+    def save_parquet_to_gcs(self, df, blob_name):
+        """Upload Parquet to Google Cloud Storage."""
+        import pyarrow.parquet as pq
+
+        with self.metrics.stage("upload"):
+            blob = self.bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
+            with blob.open("wb", content_type="application/octet-stream") as f:
+                pq.write_table(self.to_arrow_table(df), CountingWriter(f, self.metrics), compression="zstd")
+        self.metrics.count("records_uploaded", len(df))
+        print(f"Parquet uploaded to {blob_name}")
+
+    def stream_parquet_to_gcs(self, pages, blob_name):
+        """Transform pages as they arrive and write them to GCS as Parquet through a resumable upload.
+
+        Pages are buffered until PARQUET_ROW_GROUP_SIZE rows, then written as one row group.
+        Returns the number of rows written; no object is created if there were none.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        row_count = 0
+        buffered = []
+        stream = None
+        writer = None
+
+        def write_buffered():
+            nonlocal stream, writer
+            if writer is None:
+                blob = self.bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
+                stream = blob.open("wb", content_type="application/octet-stream")
+                writer = pq.ParquetWriter(CountingWriter(stream, self.metrics), arrow_schema(), compression="zstd")
+            with self.metrics.stage("upload"):
+                writer.write_table(pa.concat_tables(buffered))
+            buffered.clear()
+
+        try:
+            for pets in pages:
+                df = self.transform_to_dataframe(pets)
+                if df.empty:
+                    continue
+                buffered.append(self.to_arrow_table(df))
+                row_count += len(df)
+                if sum(table.num_rows for table in buffered) >= PARQUET_ROW_GROUP_SIZE:
+                    write_buffered()
+
+            if buffered:
+                write_buffered()
+        finally:
+            with self.metrics.stage("upload"):  # Closing writes the footer, sends the last chunk and finalizes
+                if writer is not None:
+                    writer.close()
+                if stream is not None:
+                    stream.close()
+
+        self.metrics.count("records_uploaded", row_count)
+        if row_count:
+            print(f"Parquet streamed to {blob_name} ({row_count} rows)")
+        return row_count
+
+    def gcs_uris(self, blob_names):
+        """gs:// URIs for one blob name or a list of them, for a single load job."""
+        if isinstance(blob_names, str):
+            return f"gs://{self.bucket.name}/{blob_names}"
+        return [f"gs://{self.bucket.name}/{blob_name}" for blob_name in blob_names]
+
+    def save_to_gcs(self, df, blob_name):
+        """Upload a DataFrame in the configured output format."""
+        if self.output_format == "parquet":
+            self.save_parquet_to_gcs(df, blob_name)
+        else:
+            self.save_csv_to_gcs(df, blob_name)
+
+    def pipeline_to_gcs(self, pages, prefix, pages_per_part=PAGES_PER_PART):
+        """Transform and upload chunks of pages as separate parts in the background while fetching continues.
+
+        At most two parts per upload worker wait in memory; if uploads fall behind, fetching
+        pauses until one finishes. Returns the names of the parts written, in order. The first
+        failed upload is raised as soon as it is seen, and no more pages are consumed, so a
+        run that can't store its data stops spending the request budget.
+        """
+        slots = threading.BoundedSemaphore(UPLOAD_WORKERS * 2)
+
+        def upload_part(part, pets):
+            try:
+                df = self.transform_to_dataframe(pets)
+                if df.empty:
+                    return None
+                blob_name = f"{prefix}/part-{part:05d}.{self.output_format}"
+                self.save_to_gcs(df, blob_name)
+                return blob_name
+            finally:
+                slots.release()
+
+        def raise_failed():
+            for future in futures:
+                if future.done() and future.exception() is not None:
+                    raise future.exception()
+
+        futures = []
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            try:
+                chunk, chunk_pages = [], 0
+                for pets in pages:
+                    raise_failed()
+                    chunk.extend(pets)
+                    chunk_pages += 1
+                    if chunk_pages == pages_per_part:
+                        slots.acquire()
+                        futures.append(executor.submit(upload_part, len(futures), chunk))
+                        chunk, chunk_pages = [], 0
+
+                if chunk:
+                    slots.acquire()
+                    futures.append(executor.submit(upload_part, len(futures), chunk))
+            except BaseException:
+                executor.shutdown(cancel_futures=True)  # Drop the parts not started yet
+                if hasattr(pages, "close"):
+                    pages.close()  # Stop the fetch workers, so no more requests are sent
+                raise
+
+        return [blob_name for blob_name in (future.result() for future in futures) if blob_name]
+
+    def stream_to_gcs(self, pages, blob_name):
+        """Stream pages to GCS in the configured output format. Returns the number of rows written."""
+        if self.output_format == "parquet":
+            return self.stream_parquet_to_gcs(pages, blob_name)
+        return self.stream_csv_to_gcs(pages, blob_name)
+
+    def load_to_bigquery(self, blob_name):
+        """Load one Parquet blob or a list of them into BigQuery in the configured load mode."""
+        if self.sink == "gcs":
+            print(f"Sink is GCS, leaving {blob_name} unloaded.")
+            return
+        with self.metrics.stage("load"):
+            if self.load_mode == "merge":
+                self.merge_into_bigquery(blob_name)
+            else:
+                self.load_parquet_to_bigquery(blob_name)
+
+    @property
+    def table_ref(self):
+        """The fully qualified raw table."""
+        return f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+
+    @property
+    def partition_ref(self):
+        """The table with a decorator for this run's daily partition, the only one its rows fall in."""
+        return f"{self.table_ref}${self.loaded_at:%Y%m%d}"
+
+    def ensure_table(self):
+        """Create raw_petfinder with TABLE_SCHEMA, partitioned by day on loaded_at and clustered, if it doesn't exist."""
+        from google.cloud import bigquery
+
+        table = bigquery.Table(self.table_ref, schema=bigquery_schema())
+        table.time_partitioning = time_partitioning()
+        table.clustering_fields = CLUSTERING_FIELDS
+        self.bigquery_client.create_table(table, exists_ok=True)
+
+    def merge_into_bigquery(self, blob_name):
+        """Load blob(s) into a staging table, then MERGE them into the target table on id.
+
+        Keeps one row per pet: new ids are inserted, and existing ids take the staged row
+        unless the table already holds a later published_at. Reruns and overlapping windows
+        therefore never duplicate animals in the raw table, at the cost of scanning all of it.
+        """
+        table_ref = self.table_ref
+        staging_ref = f"{table_ref}_staging_{uuid.uuid4().hex[:12]}"
+
+        try:
+            self.ensure_table()
+            self.load_parquet_to_bigquery(blob_name, staging_ref, "WRITE_TRUNCATE")
+
+            update_columns = ", ".join(f"{column} = S.{column}" for column in TABLE_COLUMNS if column != "id")
+            merge_sql = f"""
+                MERGE `{table_ref}` T
+                USING (
+                    SELECT * EXCEPT(row_num) FROM (
+                        SELECT *, ROW_NUMBER() OVER (PARTITION BY id ORDER BY published_at DESC) AS row_num
+                        FROM `{staging_ref}`
+                    )
+                    WHERE row_num = 1
+                ) S
+                ON T.id = S.id
+                WHEN MATCHED AND (T.published_at IS NULL OR S.published_at >= T.published_at) THEN
+                    UPDATE SET {update_columns}
+                WHEN NOT MATCHED THEN
+                    INSERT ROW
+            """
+            merge_job = self.bigquery_client.query(merge_sql)
+            merge_job.result()  # Wait for the job to complete
+            self.metrics.count("rows_merged", merge_job.num_dml_affected_rows or 0)
+            print(f"Merged data from {blob_name} into BigQuery table {table_ref} "
+                  f"({merge_job.num_dml_affected_rows} rows inserted or updated)")
+        finally:
+            self.bigquery_client.delete_table(staging_ref, not_found_ok=True)
+
+    def load_parquet_to_bigquery(self, blob_name, table_ref=None, write_disposition="WRITE_APPEND"):
+        """Load Parquet file(s) from GCS to BigQuery with the explicit TABLE_SCHEMA.
+
+        Without a table_ref, the rows are appended to this run's partition of raw_petfinder,
+        which is created first if needed.
+        """
+        from google.cloud import bigquery
+
+        if table_ref is None:
+            self.ensure_table()
+            table_ref = self.partition_ref
+        uri = self.gcs_uris(blob_name)
+
+        parquet_options = bigquery.ParquetOptions()
+        parquet_options.enable_list_inference = True  # Load tags as REPEATED STRING, not a nested record
+
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            schema=bigquery_schema(),
+            parquet_options=parquet_options,
+            write_disposition=write_disposition  # Append data instead of overwriting by default
+        )
+
+        load_job = self.bigquery_client.load_table_from_uri(uri, table_ref, job_config=job_config)
+        load_job.result()  # Wait for the job to complete
+        self.metrics.count("load_jobs")
+        self.metrics.count("rows_loaded", load_job.output_rows or 0)
+        print(f"Loaded data from {blob_name} into BigQuery table {table_ref}")
+
+    def fetch_transform_upload(self, pet_data):
+        """Fetch, transform, and upload data."""
+        try:
+            df = self.transform_to_dataframe(pet_data)
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            blob_name = f"processed/petfinder_{timestamp}.{self.output_format}"
+
+            if self.output_format == "parquet":
+                self.save_parquet_to_gcs(df, blob_name)
+            else:
+                self.save_csv_to_gcs(df, blob_name)
+
+            # Load into BigQuery
+            self.load_to_bigquery(blob_name)
+
+        except Exception as e:
+            print(f"Error processing data: {e}")
+            logging.error(traceback.format_exc())
+
+    def stream_transform_upload(self, pages, run_name=None):
+        """Transform and upload pages in parts while they are fetched, then load all parts in one job.
+
+        Parts go under processed/<run_name>/. Returns True once everything fetched is loaded,
+        False if processing failed.
+        """
+        try:
+            run_name = run_name or f"petfinder_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+            blob_names = self.pipeline_to_gcs(pages, f"processed/{run_name}")
+            if blob_names:
+                self.load_to_bigquery(blob_names)
+            else:
+                print("No records fetched, nothing to load.")
+            return True
+
+        except Exception as e:
+            print(f"Error processing data: {e}")
+            logging.error(traceback.format_exc())
+            return False
+
+    def save_run_report(self, run_name, **fields):
+        """Upload the run metrics as JSON to reports/<run_name>.json and log them as one structured line."""
+        report = dict(self.metrics.report(), run=run_name, **fields)
+        blob_name = f"{REPORT_PREFIX}/{run_name}.json"
+        self.bucket.blob(blob_name).upload_from_string(json.dumps(report, indent=2), "application/json")
+        log_event("run_report", blob=blob_name, **report)
+        print(f"Run report uploaded to {blob_name}")
+        return blob_name
@@ -0,0 +1,98 @@
+# Standard imports
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+# Constants
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Upper bounds (seconds) of the latency histograms
+
+
+logger = logging.getLogger("petfinder")
+
+
+def log_event(event, **fields):
+    """Log one structured event as a single JSON line."""
+    logger.info(json.dumps({"event": event, **fields}, default=str))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where the resource module is missing."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # ru_maxrss is KiB on Linux
+
+
+# Run Metrics
+class RunMetrics:
+    """Counters, latency histograms and stage timings of one run, safe to share across threads.
+
+    The API client and the data loader record into the same instance. Every finished stage
+    is logged as a JSON line, and report() summarises the run for the JSON run report.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.counters = {}
+        self.histograms = {}
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Add one value, in seconds, to a histogram bucketed by LATENCY_BUCKETS."""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {"count": 0, "sum": 0.0, "max": 0.0,
+                                                     "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+            histogram["count"] += 1
+            histogram["sum"] += value
+            histogram["max"] = max(histogram["max"], value)
+            histogram["buckets"][bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work. A stage that runs on several threads adds up the time of each."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                stage["calls"] += 1
+                stage["seconds"] += seconds
+            log_event("stage", stage=name, seconds=round(seconds, 4), peak_rss_mb=peak_rss_mb())
+
+    def report(self):
+        """Summary of the run so far, as a JSON-serialisable dict."""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {name: dict(histogram, sum=round(histogram["sum"], 4), max=round(histogram["max"], 4),
+                                     buckets=list(histogram["buckets"]))
+                          for name, histogram in self.histograms.items()}
+            stages = {name: {"calls": stage["calls"], "seconds": round(stage["seconds"], 4)}
+                      for name, stage in self.stages.items()}
+
+        dedup_input = counters.get("dedup_input_records", 0)
+        return {
+            "started_at": self.started_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "wall_seconds": round(time.perf_counter() - self.start, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "counters": counters,
+            "dedup_hit_rate": round(counters.get("dedup_dropped_records", 0) / dedup_input, 4) if dedup_input else None,
+            "latency_buckets": list(LATENCY_BUCKETS) + ["inf"],
+            "histograms": histograms,
+            "stages": stages,
+        }
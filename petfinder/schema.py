@@ -0,0 +1,90 @@
+# Standard imports
+import sys
+
+
+# Explicit schema of the raw_petfinder table: (column, BigQuery type, mode)
+RAW_SCHEMA = [
+    ("id", "INTEGER", "NULLABLE"),
+    ("organization_id", "STRING", "NULLABLE"),
+    ("species", "STRING", "NULLABLE"),
+    ("primary_breed", "STRING", "NULLABLE"),
+    ("primary_color", "STRING", "NULLABLE"),
+    ("age", "STRING", "NULLABLE"),
+    ("gender", "STRING", "NULLABLE"),
+    ("size", "STRING", "NULLABLE"),
+    ("name", "STRING", "NULLABLE"),
+    ("status", "STRING", "NULLABLE"),
+    ("spayed_neutered", "BOOLEAN", "NULLABLE"),
+    ("house_trained", "BOOLEAN", "NULLABLE"),
+    ("declawed", "BOOLEAN", "NULLABLE"),
+    ("special_needs", "BOOLEAN", "NULLABLE"),
+    ("shots_current", "BOOLEAN", "NULLABLE"),
+    ("good_with_children", "BOOLEAN", "NULLABLE"),
+    ("good_with_dogs", "BOOLEAN", "NULLABLE"),
+    ("good_with_cats", "BOOLEAN", "NULLABLE"),
+    ("tags", "STRING", "REPEATED"),
+    ("email", "STRING", "NULLABLE"),
+    ("location", "STRING", "NULLABLE"),
+    ("postcode", "STRING", "NULLABLE"),
+    ("published_at", "TIMESTAMP", "NULLABLE"),
+]
+RAW_COLUMNS = [name for name, _, _ in RAW_SCHEMA]  # Column order of the projected records and DataFrames
+PUBLISHED_AT = RAW_COLUMNS.index("published_at")
+# raw_petfinder adds the time each row was loaded, which it is partitioned on by day
+TABLE_SCHEMA = RAW_SCHEMA + [("loaded_at", "TIMESTAMP", "NULLABLE")]
+TABLE_COLUMNS = [name for name, _, _ in TABLE_SCHEMA]
+PARTITION_FIELD = "loaded_at"
+CLUSTERING_FIELDS = ["species", "organization_id"]
+# Low-cardinality columns, held as categoricals in the transformed DataFrames
+CATEGORICAL_COLUMNS = ["species", "primary_breed", "primary_color", "age", "gender", "size", "status"]
+
+
+def interned(value):
+    """The one shared copy of a string, so repeated values take no extra memory."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def project_pets(pets):
+    """Project raw animals onto RAW_COLUMNS as row tuples, as soon as a page is parsed.
+
+    Everything the table doesn't hold (photos, videos, links, descriptions) is dropped, each
+    nested object is looked up once per record, and repeated strings such as species,
+    breeds, colors, organizations and locations are interned, so a pet in flight is one
+    small tuple sharing most of its strings with the other pets.
+    """
+    empty = {}
+    rows = []
+    append = rows.append
+    for pet in pets:
+        get = pet.get
+        attributes = get("attributes") or empty
+        environment = get("environment") or empty
+        contact = get("contact") or empty
+        address = contact.get("address") or empty
+        append((
+            get("id"),
+            interned(get("organization_id")),
+            interned(get("species")),
+            interned((get("breeds") or empty).get("primary")),
+            interned((get("colors") or empty).get("primary")),
+            interned(get("age")),
+            interned(get("gender")),
+            interned(get("size")),
+            get("name"),
+            interned(get("status")),
+            attributes.get("spayed_neutered"),
+            attributes.get("house_trained"),
+            attributes.get("declawed"),
+            attributes.get("special_needs"),
+            attributes.get("shots_current"),
+            environment.get("children"),
+            environment.get("dogs"),
+            environment.get("cats"),
+            [interned(tag) for tag in get("tags") or []],  # List of tags
+            interned(contact.get("email")),
+            interned(f"{address.get('city', '')}, {address.get('state', '')}".strip(", ")) if address else None,
+            address.get("postcode"),
+            get("published_at"),
+        ))
+
+    return rows
@@ -0,0 +1,228 @@
+# Standard imports
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+
+# External imports
+import numpy as np
+
+
+# Constants
+STATE_BLOB = "state/petfinder_state.json"  # Watermark and page progress, kept next to the data
+CHANGE_INDEX_BLOB = "state/petfinder_change_index.npz"  # id -> hash of every loaded pet, to skip unchanged ones
+
+
+# Ingestion State Stores
+class LocalStateStore:
+    """Keep ingestion state in a local JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        data = self.read_bytes()
+        return None if data is None else json.loads(data)
+
+    def write(self, state):
+        self.write_bytes(json.dumps(state, indent=2).encode())
+
+    def read_bytes(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def write_bytes(self, data):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)  # Never leave a half-written state file behind
+
+
+class GCSStateStore:
+    """Keep ingestion state in a JSON object in the data bucket."""
+
+    def __init__(self, bucket, blob_name=STATE_BLOB):
+        self.bucket = bucket
+        self.blob_name = blob_name
+
+    def read(self):
+        blob = self.bucket.blob(self.blob_name)
+        if not blob.exists():
+            return None
+        return json.loads(blob.download_as_text())
+
+    def write(self, state):
+        blob = self.bucket.blob(self.blob_name)
+        blob.upload_from_string(json.dumps(state, indent=2), "application/json")
+
+    def read_bytes(self):
+        blob = self.bucket.blob(self.blob_name)
+        if not blob.exists():
+            return None
+        return blob.download_as_bytes()
+
+    def write_bytes(self, data):
+        blob = self.bucket.blob(self.blob_name)
+        blob.upload_from_string(data, "application/octet-stream")
+
+
+# Ingestion State
+class IngestionState:
+    """High-watermark of the pets loaded so far, plus the progress of an unfinished run.
+
+    Each run requests only pets published after the watermark. A run that stops early, for
+    example when the request budget runs out, moves its window's start past the pets it
+    loaded in order, and the next run fetches the rest of the window from its first page.
+    Page numbers aren't kept, since they shift as pets on earlier pages are adopted.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.watermark = None  # Latest published_at loaded (ISO 8601)
+        self.run = None        # {"after", "before", "max_published_at"} of an unfinished run
+
+    def load(self):
+        state = self.store.read() or {}
+        self.watermark = state.get("watermark")
+        self.run = state.get("run")
+        return self
+
+    def save(self):
+        self.store.write({"watermark": self.watermark, "run": self.run})
+
+    def start_run(self, client, planner=None):
+        """Point the client at the delta since the watermark, or at the unfinished run.
+
+        With a ShardPlanner a new run's window is closed at the current time and split into
+        shards, kept in the run so that an interrupted run resumes shard by shard. Planning
+        that ran out of budget is carried on by the next run, which needs a ShardPlanner too.
+        """
+        if self.run:
+            progress = f", {sum(shard['done'] for shard in self.shards)} of {len(self.shards)} shards already loaded" \
+                if self.shards is not None else ""
+            print(f"Resuming run after {self.run['after']}{progress}.")
+        else:
+            client.after = self.watermark
+            client.page_params(1)  # Falls back to the lookback window when there is no watermark yet
+            self.run = {"after": client.after, "before": None, "max_published_at": None}
+            if planner is not None:
+                # Close the window, so new pets can't change the shard counts while they are planned
+                client.before = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                self.run.update(before=client.before, shards=[], pending=[planner.partition({}, 0)])
+            self.save()
+            print(f"Fetching pets published after {client.after}.")
+
+        client.after = self.run["after"]
+        client.before = self.run.get("before")
+        if self.run.get("pending"):
+            planner.plan(self.run, lambda run: self.save())
+
+    @property
+    def shards(self):
+        """Shards of the current run, or None if it isn't sharded."""
+        return self.run.get("shards") if self.run else None
+
+    def finish_run(self, client):
+        """Record how far this run loaded, and advance the watermark once the whole window is loaded."""
+        if client.max_published_at is not None:
+            latest = client.max_published_at.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            self.run["max_published_at"] = max(filter(None, [self.run["max_published_at"], latest]))
+
+        if self.shards is not None:
+            missing = sum(not shard["done"] for shard in self.shards)  # Updated in place by iter_shard_pages
+            unplanned = len(self.run.get("pending", []))
+            complete = missing == 0 and unplanned == 0
+            left = f"{missing} shards" + (f" and {unplanned} partitions to plan" if unplanned else "")
+        else:
+            complete = client.is_complete()
+            resume_after = client.resume_after()
+            if not complete and resume_after is not None:
+                self.run["after"] = max(self.run["after"], resume_after)
+            missing = client.total_pages - len(set(client.fetched_pages)) if client.total_pages is not None \
+                else "unknown"
+            left = f"the pets published after {self.run['after']}, about {missing} pages,"
+
+        if complete:
+            self.watermark = max(filter(None, [self.watermark, self.run["max_published_at"]]), default=None)
+            self.run = None
+            print(f"Window fully loaded, watermark is now {self.watermark}.")
+        else:
+            print(f"Window partially loaded, {left} left for the next run.")
+        self.save()
+
+
+# Change Index
+class ChangeIndex:
+    """Hash of the loaded columns of every pet, to skip pets that haven't changed since they were loaded.
+
+    Kept as two sorted arrays, 8-byte ids and 8-byte hashes, so millions of pets take a few
+    megabytes and a page is checked with one vectorised search. Hashes of the records let
+    through are only merged into the index by commit(), once they are loaded into BigQuery.
+    Delete the index object to reload everything, e.g. after rebuilding raw_petfinder.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.ids = np.empty(0, dtype=np.int64)
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.pending = {}  # id -> hash of the records let through by this run, not loaded yet
+        self.lock = threading.Lock()
+
+    def load(self):
+        data = self.store.read_bytes()
+        if data is not None:
+            with np.load(io.BytesIO(data)) as arrays:
+                self.ids, self.hashes = arrays["ids"], arrays["hashes"]
+        return self
+
+    def save(self):
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, ids=self.ids, hashes=self.hashes)
+        self.store.write_bytes(buffer.getvalue())
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def row_hash(row):
+        """Stable 64-bit hash of a flattened row (Python's hash() of str changes between runs)."""
+        return int.from_bytes(hashlib.blake2b(repr(row).encode(), digest_size=8).digest(), "little")
+
+    def filter(self, rows):
+        """The rows that are new or changed since the last committed load, in their original order."""
+        if not rows:
+            return rows
+
+        ids = np.fromiter((-1 if row[0] is None else row[0] for row in rows), dtype=np.int64, count=len(rows))
+        hashes = np.fromiter((self.row_hash(row) for row in rows), dtype=np.uint64, count=len(rows))
+        if len(self.ids):
+            positions = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+            changed = (self.ids[positions] != ids) | (self.hashes[positions] != hashes)
+        else:
+            changed = np.ones(len(rows), dtype=bool)
+        changed |= ids == -1  # Rows without an id can't be tracked, always let them through
+
+        indexed = changed & (ids != -1)
+        with self.lock:
+            self.pending.update(zip(ids[indexed].tolist(), hashes[indexed].tolist()))
+        return [row for row, keep in zip(rows, changed.tolist()) if keep]
+
+    def commit(self):
+        """Merge the hashes of the records let through into the index, once they are loaded."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+
+        ids = np.fromiter(pending.keys(), dtype=np.int64, count=len(pending))
+        hashes = np.fromiter(pending.values(), dtype=np.uint64, count=len(pending))
+        kept = ~np.isin(self.ids, ids)
+        ids = np.concatenate([self.ids[kept], ids])
+        hashes = np.concatenate([self.hashes[kept], hashes])
+        order = np.argsort(ids, kind="stable")
+        self.ids, self.hashes = ids[order], hashes[order]
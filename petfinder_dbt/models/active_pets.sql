@@ -7,5 +7,5 @@ SELECT
     size,
     status,
     location
-FROM `petfinderapi.petfinder_data.raw_petfinder`
+FROM {{ ref('stg_petfinder') }}
 WHERE status = 'adoptable'
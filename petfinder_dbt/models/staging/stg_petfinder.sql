@@ -1,3 +1,17 @@
+{{ config(
+    materialized='incremental',
+    unique_key='id',
+    incremental_strategy='merge',
+    partition_by={'field': 'loaded_at', 'data_type': 'TIMESTAMP', 'granularity': 'day'},
+    cluster_by=['species', 'organization_id']
+) }}
+
+{#- A literal bound lets BigQuery prune raw_petfinder's partitions; a subquery bound would scan them all -#}
+{% set max_loaded_at = none %}
+{% if execute and is_incremental() %}
+    {% set max_loaded_at = run_query("SELECT MAX(loaded_at) FROM " ~ this).columns[0][0] %}
+{% endif %}
+
 WITH raw AS (
     SELECT
         id,
@@ -20,11 +34,19 @@ WITH raw AS (
         tags,
         location,
         postcode,
-        TIMESTAMP(published_at) AS published_at,
+        published_at,
         organization_id,
-        email
+        email,
+        loaded_at
     FROM `petfinderapi.petfinder_data.raw_petfinder`
+    {% if is_incremental() and max_loaded_at %}
+    -- Only the partitions loaded since the last run, looking back a day: loaded_at is stamped when a run starts, so a
+    -- run still loading during the last dbt run can land rows older than its max. The merge on id dedups the overlap.
+    WHERE loaded_at >= TIMESTAMP_SUB(TIMESTAMP('{{ max_loaded_at }}'), INTERVAL 1 DAY)
+    {% endif %}
 )
 
+-- One row per pet: the latest version, which replaces the existing row on merge
 SELECT * FROM raw
-WHERE status = 'adoptable'  -- Only include adoptable pets
+WHERE TRUE
+QUALIFY ROW_NUMBER() OVER (PARTITION BY id ORDER BY published_at DESC, loaded_at DESC) = 1
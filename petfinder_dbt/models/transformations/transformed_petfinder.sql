@@ -14,14 +14,14 @@ WITH cleaned_data AS (
         size,
         primary_breed,
         primary_color,
-        CAST(spayed_neutered AS BOOL) AS spayed_neutered,
-        CAST(house_trained AS BOOL) AS house_trained,
-        CAST(declawed AS BOOL) AS declawed,
-        CAST(special_needs AS BOOL) AS special_needs,
-        CAST(shots_current AS BOOL) AS shots_current,
-        CAST(good_with_children AS BOOL) AS good_with_children,
-        CAST(good_with_dogs AS BOOL) AS good_with_dogs,
-        CAST(good_with_cats AS BOOL) AS good_with_cats,
+        spayed_neutered,
+        house_trained,
+        declawed,
+        special_needs,
+        shots_current,
+        good_with_children,
+        good_with_dogs,
+        good_with_cats,
         tags,
         location,
         SPLIT(location, ', ')[SAFE_OFFSET(0)] AS city,
@@ -31,7 +31,7 @@ WITH cleaned_data AS (
         organization_id,
         email,
         CASE
-            WHEN ARRAY_LENGTH(SPLIT(tags, ', ')) > 0 THEN ARRAY_TO_STRING(SPLIT(tags, ', '), ', ')
+            WHEN ARRAY_LENGTH(tags) > 0 THEN ARRAY_TO_STRING(tags, ', ')
             ELSE NULL
         END AS tags_string,
         CASE
@@ -42,6 +42,7 @@ WITH cleaned_data AS (
             ELSE 'Unknown'
         END AS age_group
     FROM {{ ref('stg_petfinder') }}
+    WHERE status = 'adoptable'  -- Only include adoptable pets
 )
 
 SELECT * FROM cleaned_data